@@ -1,21 +1,51 @@
 import asyncio
+import os
+import queue
 import random
-from crawl4ai import AsyncWebCrawler
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import sys
+from crawler_pool import CrawlerPool
+from http_fetch import HttpFetcher
+from fetch_cache import FetchCache
+from scheduler import FetchScheduler
+import database as db
+import metrics
+from cleaner import Cleaner
+from dedup import dedup_articles
+from extract import clean_image_url, extract_headlines, extract_menu_topics, extract_story_links, google_news_id
 
 # Fix para Linux/Codespaces
 if sys.platform.startswith("linux"):
     asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
 
 class NewsAggregatorPro:
-    def __init__(self):
+    def __init__(self, pool_size=None, max_pages_per_crawler=100, pool=None,
+                 fetch_mode="auto", min_headlines=8, min_topics=3, cache=None,
+                 story_deadline=45.0, quorum=6, base_url=None):
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
         ]
-        self.base_url = "https://news.google.com"
+        # Trocável para rodar contra o servidor de replay dos benchmarks (sem rede)
+        self.base_url = (base_url or os.getenv("NEWS_BASE_URL", "https://news.google.com")).rstrip("/")
+        self.menu_url = f"{self.base_url}/?hl=pt-BR&gl=BR&ceid=BR%3Apt-419"
+        # Navegadores quentes reaproveitados entre chamadas (antes: um Chromium por clique)
+        if pool is None:
+            size = pool_size or int(os.getenv("CRAWLER_POOL_SIZE", "2"))
+            pool = CrawlerPool(size=size, max_pages=max_pages_per_crawler)
+        self.pool = pool
+        # "auto": HTTP primeiro e navegador só se faltar item; "http" ou "browser" forçam um caminho
+        self.fetch_mode = fetch_mode
+        self.min_headlines = min_headlines
+        self.min_topics = min_topics
+        self.http = HttpFetcher()
+        # Cache em disco das páginas (TTL por tipo + revalidação condicional)
+        self.cache = cache if cache is not None else FetchCache(os.getenv("FETCH_CACHE_DIR", "data/cache"))
+        # Teto global + balde por domínio; os links de artigo passam todos por news.google.com
+        self.scheduler = FetchScheduler(domain_rates={urlparse(self.base_url).netloc: (5.0, 10)})
+        self.cleaner = Cleaner()
+        self.story_deadline = story_deadline
+        self.quorum = quorum
 
     def _get_headers(self):
         return {
@@ -25,111 +55,89 @@ class NewsAggregatorPro:
         }
 
     def _clean_image_url(self, url):
-        if not url: return None
-        if "googleusercontent.com" in url: return url
-        if url.startswith("data:image"): return url
-        if "/api/attachments/" in url: return None
-        if "favicon" in url: return None
-        if not url.startswith("http"): return None
-        return url
+        return clean_image_url(url)
+
+    # --- 0. BUSCA HTTP COM FALLBACK ---
+    async def _http_revalidate(self, url, kind, entry):
+        """GET (condicional se houver cópia vencida). Devolve HTML ou None."""
+        headers = self._get_headers()
+        if entry: headers.update(entry.validators())
+        with metrics.span("http_get", kind=kind, domain=urlparse(url).netloc) as sp:
+            resp = await self.http.get(url, headers=headers)
+            if resp is None:
+                sp.status = "error"
+                return entry.data.get("html") if entry else None  # rede caiu: serve a cópia vencida
+            if resp.status_code == 304 and entry:
+                sp.status = "not_modified"
+                self.cache.touch(url)
+                return entry.data.get("html")
+            if resp.status_code != 200:
+                sp.status = f"http_{resp.status_code}"
+                return None
+            sp.bytes = len(resp.content)
+        self.cache.put(url, kind, {"html": resp.text},
+                       etag=resp.headers.get("etag"), last_modified=resp.headers.get("last-modified"))
+        return resp.text
+
+    async def _parse(self, parse, html, kind):
+        # Parse é CPU puro: roda fora do event loop para não travar os outros downloads
+        with metrics.span("parse", kind=kind) as sp:
+            sp.bytes = len(html)
+            return await asyncio.to_thread(parse, html)
+
+    async def _fetch_parsed(self, crawler, url, kind, parse, min_items, revalidate=False, **browser_kwargs):
+        """Cache -> HTTP puro -> navegador; só escala se vierem menos de `min_items`.
+
+        Com `revalidate`, a cópia fresca do cache não basta: vai à rede (GET condicional).
+        """
+        items = []
+        entry = self.cache.get(url, kind)
+        if entry and entry.fresh and not revalidate:
+            items = await self._parse(parse, entry.data["html"], kind)
+            if len(items) >= min_items: return items
+        elif self.fetch_mode != "browser":
+            html = await self._http_revalidate(url, kind, entry)
+            if html: items = await self._parse(parse, html, kind)
+            if len(items) >= min_items: return items
+        if self.fetch_mode == "http": return items
+        if items or entry: print(f"   ↪️ HTTP/cache trouxe {len(items)} itens, escalando p/ navegador")
+
+        with metrics.span("browser_get", kind=kind, domain=urlparse(url).netloc) as sp:
+            result = await crawler.arun(url=url, magic=True, headers=self._get_headers(), **browser_kwargs)
+            if not result.success:
+                sp.status = "error"
+                return items
+            sp.bytes = len(result.html or "")
+        parsed = await self._parse(parse, result.html, kind)
+        if len(parsed) < len(items): return items
+        self.cache.put(url, kind, {"html": result.html})
+        return parsed
 
     # --- 1. MENU ---
+    def _parse_menu(self, html):
+        return extract_menu_topics(html, self.base_url)
+
     async def _scan_menu(self, crawler):
         print("   🧭 Mapeando Menu...")
-        url = "https://news.google.com/?hl=pt-BR&gl=BR&ceid=BR%3Apt-419"
         try:
-            result = await crawler.arun(url=url, magic=True, bypass_cache=True, headers=self._get_headers())
-            if not result.success: return []
-            
-            soup = BeautifulSoup(result.html, 'html.parser')
-            topics = []
-            seen = set()
-            priority = ["Brasil", "Mundo", "Local", "Negócios", "Tecnologia", "Entretenimento", "Esportes", "Saúde"]
-
-            for a in soup.find_all('a', href=True):
-                href = a['href']
-                txt = a.get_text(strip=True)
-                if "./topics/" in href and len(txt) > 2 and len(txt) < 20:
-                    if any(p.lower() in txt.lower() for p in priority):
-                        full = href.replace(".", self.base_url, 1)
-                        if full not in seen:
-                            topics.append({"title": txt, "url": full})
-                            seen.add(full)
-            
-            topics.sort(key=lambda x: next((i for i, p in enumerate(priority) if p.lower() in x['title'].lower()), 99))
-            return topics
-        except: return []
+            with metrics.span("scan_menu"):
+                return await self._fetch_parsed(crawler, self.menu_url, "menu", self._parse_menu, self.min_topics, bypass_cache=True)
+        except Exception as e:
+            print(f"Erro menu: {e}")
+            return []
 
     # --- 2. MANCHETES (SEM <ARTICLE>) ---
-    async def _scan_headlines(self, crawler, topic_url):
+    def _parse_headlines(self, html):
+        return extract_headlines(html, self.base_url, self._clean_image_url)
+
+    async def _scan_headlines(self, crawler, topic_url, revalidate=False):
         print(f"   📂 Lendo Tópico: {topic_url}")
         js_scroll = "window.scrollBy(0, 1000); await new Promise(r => setTimeout(r, 400)); window.scrollBy(0, 1000);"
         try:
-            result = await crawler.arun(url=topic_url, js_code=js_scroll, magic=True, headers=self._get_headers())
-            if not result.success: return []
-
-            soup = BeautifulSoup(result.html, 'html.parser')
-            headlines = []
-            seen = set()
-
-            # CAÇADOR DE LINKS BRUTO (Foda-se a tag article)
-            all_links = soup.find_all('a', href=True)
-            
-            for a in all_links:
-                href = a['href']
-                
-                # Aceita stories (cobertura) E articles (manchetes diretas)
-                is_story = "./stories/" in href
-                is_article = "./articles/" in href
-                
-                if not (is_story or is_article): continue
-                
-                full_link = href.replace(".", self.base_url, 1)
-                if full_link in seen: continue
-
-                # Tenta pegar título do link
-                title = a.get_text(strip=True)
-                
-                # Se título for ruim ("Veja mais"), sobe na árvore pra achar o pai
-                card_block = None
-                parent = a.parent
-                # Sobe até achar um container que tenha imagem ou texto grande
-                for _ in range(4):
-                    if parent:
-                        if parent.find('img') or parent.find('h3') or parent.find('h4'):
-                            card_block = parent
-                            break
-                        parent = parent.parent
-                
-                if card_block:
-                    # Tenta achar H3/H4
-                    h = card_block.find(['h3', 'h4'])
-                    if h: 
-                        title = h.get_text(strip=True)
-                    elif len(title) < 10:
-                        # Pega o maior link de texto dentro do bloco
-                        sub_links = card_block.find_all('a')
-                        valid_texts = [l.get_text(strip=True) for l in sub_links]
-                        if valid_texts: title = max(valid_texts, key=len)
-
-                if len(title) < 10: continue
-
-                # Imagem
-                img_src = None
-                if card_block:
-                    img = card_block.find('img')
-                    if img:
-                        raw = img.get('src') or img.get('data-src') or img.get('srcset', '').split(' ')[0]
-                        img_src = self._clean_image_url(raw)
-
-                headlines.append({
-                    "title": title,
-                    "url": full_link,
-                    "image": img_src,
-                    "is_cluster": is_story
-                })
-                seen.add(full_link)
-
+            with metrics.span("scan_headlines") as sp:
+                headlines = await self._fetch_parsed(crawler, topic_url, "topic", self._parse_headlines, self.min_headlines,
+                                                     revalidate=revalidate, js_code=js_scroll)
+                if not headlines: sp.status = "empty"
             print(f"   ✅ Itens: {len(headlines)}")
             return headlines[:30]
         except Exception as e:
@@ -137,59 +145,146 @@ class NewsAggregatorPro:
             return []
 
     # --- 3. CONTEÚDO (COM RETORNO DE URL) ---
-    async def _deep_dive(self, crawler, url, max_items):
+    async def _story_links(self, crawler, url, max_items):
+        """Links de artigo da página da história (uma página só, sem abrir os artigos)."""
+        entry = self.cache.get(url, "story")
+        if entry and entry.fresh:
+            html = entry.data["html"]
+        else:
+            with metrics.span("browser_get", kind="story", domain=urlparse(url).netloc) as sp:
+                result = await crawler.arun(url=url, magic=True, headers=self._get_headers())
+                html = result.html
+                sp.bytes = len(html or "")
+                if not result.success: sp.status = "error"
+            if result.success: self.cache.put(url, "story", {"html": html})
+
+        # Pega links internos da página (seja story ou article redirecionado)
+        links = await self._parse(lambda h: extract_story_links(h, self.base_url), html, "story")
+        return links[:max_items]
+
+    async def _deep_dive(self, crawler, url, max_items, on_result=None):
+        with metrics.span("deep_dive") as sp:
+            articles = await self._dive(crawler, url, max_items, on_result)
+            if not articles: sp.status = "empty"
+            return articles
+
+    async def _dive(self, crawler, url, max_items, on_result):
         try:
             print(f"   🕵️ Mergulhando: {url}")
-            result = await crawler.arun(url=url, magic=True, headers=self._get_headers())
-            
-            soup = BeautifulSoup(result.html, 'html.parser')
-            links = set()
-            
-            # Pega links internos da página (seja story ou article redirecionado)
-            for a in soup.find_all('a', href=True):
-                if "./articles/" in a['href'] or "/read/" in a['href']:
-                    full = a['href'].replace(".", self.base_url, 1) if a['href'].startswith(".") else a['href']
-                    links.add(full)
-            
-            final_links = list(links)[:max_items]
+            final_links = await self._story_links(crawler, url, max_items)
             if not final_links: final_links = [url] # Se não achou filhos, tenta o próprio pai
 
-            async def fetch(l):
-                try:
-                    await asyncio.sleep(random.uniform(0.1, 0.5))
-                    res = await crawler.arun(url=l, magic=True, word_count_threshold=200)
-                    
-                    if res.success and res.markdown:
-                        dom = urlparse(res.url).netloc.replace("www.", "")
-                        return {
-                            "title": res.media.get("title", "Sem Título"), 
-                            "source_domain": dom, 
-                            "content": res.markdown,
-                            "url": res.url # <--- CORREÇÃO DO KEYERROR
-                        }
-                except: pass
-                return None
+            # Redirects já resolvidos antes: vai direto no publisher, sem passar pelo Google
+            resolved = db.get_resolved_urls(google_news_id(l, self.base_url) for l in final_links)
+            origin = {}  # URL realmente buscada -> link original do Google News (chave do cache)
+            learned = []
+
+            async def fetch(target):
+                # Exceção -> o scheduler tenta de novo; None -> página sem conteúdo útil
+                l = origin.get(target, target)
+                with metrics.span("fetch_article", domain=urlparse(target).netloc.replace("www.", "")) as sp:
+                    res = await crawler.arun(url=target, magic=True, word_count_threshold=200)
+                    if not res.success: raise RuntimeError(res.error_message or "crawl falhou")
+                    # res.url é a URL pedida; a canônica é para onde os redirects levaram
+                    final = res.redirected_url or res.url
+                    dom = sp.labels["domain"] = urlparse(final).netloc.replace("www.", "")
+                    gn_id = google_news_id(l, self.base_url)
+                    if gn_id and not dom.endswith("google.com"): learned.append((gn_id, final, dom))
+                    sp.bytes = len(res.html or "")
+                    if not res.markdown:
+                        sp.status = "empty"
+                        return None
+                    with metrics.span("clean", domain=dom):
+                        content = self.cleaner.clean(str(res.markdown), dom)
+                    art = {
+                        "title": res.media.get("title", "Sem Título"), 
+                        "source_domain": dom, 
+                        # Sem chrome de leitor/publisher: prompt, dedup e banco ficam menores
+                        "content": content,
+                        "url": final
+                    }
+                    if len(art["content"]) <= 200:
+                        sp.status = "empty"
+                        return None
+                self.cache.put(l, "article", art)
+                return art
 
-            tasks = [fetch(l) for l in final_links]
-            results = await asyncio.gather(*tasks)
-            valid = [r for r in results if r is not None and len(r['content']) > 200]
-            return valid
+            # Corpo de artigo praticamente não muda: o que está no cache nem entra na fila
+            valid, to_fetch = [], []
+            for l in final_links:
+                entry = self.cache.get(l, "article")
+                if entry and entry.fresh:
+                    valid.append(entry.data)
+                    gn_id = google_news_id(l, self.base_url)
+                    dom = entry.data.get("source_domain", "")
+                    if gn_id and gn_id not in resolved and entry.data.get("url") and not dom.endswith("google.com"):
+                        learned.append((gn_id, entry.data["url"], dom))
+                    continue
+                known = resolved.get(google_news_id(l, self.base_url))
+                target = known["canonical_url"] if known else l
+                origin[target] = l
+                to_fetch.append(target)
+            if on_result:
+                for art in valid: on_result(art)
+            if resolved: print(f"   🔗 {len(resolved)} redirects já conhecidos")
+
+            # 0 = o cache já cobre o quórum: o gather só espera a janela de grace pelos outros
+            quorum = max(0, min(self.quorum, len(final_links)) - len(valid))
+            valid += await self.scheduler.gather(to_fetch, fetch, deadline=self.story_deadline, quorum=quorum,
+                                                 on_result=on_result)
+            db.save_resolved_urls(learned)
+            # Mesma matéria de agência em vários sites: fica uma cópia + "também publicado por"
+            with metrics.span("dedup"):
+                return await asyncio.to_thread(dedup_articles, valid)
         except Exception as e: 
             print(f"Erro deep dive: {e}")
             return []
 
+    # --- 4. TODOS OS TÓPICOS DE UMA VEZ ---
+    async def _scan_all(self, crawler, topics, concurrency, on_result):
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(topic):
+            async with sem:
+                on_result(topic, await self._scan_headlines(crawler, topic['url']))
+
+        await asyncio.gather(*(one(t) for t in topics))
+
     # --- WRAPPERS ---
     def _run_sync(self, coro):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        crawler = AsyncWebCrawler(verbose=False)
-        try:
-            return loop.run_until_complete(coro(crawler))
-        finally:
-            try: loop.run_until_complete(crawler.crawler_strategy.close()) 
-            except: pass
-            loop.close()
+        return self.pool.run(coro)
+
+    def close(self):
+        try: self.pool.submit(self.http.aclose()).result(10)
+        except Exception: pass
+        self.pool.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
 
     def get_menu_topics(self): return self._run_sync(self._scan_menu)
-    def get_headlines_from_topic(self, url): return self._run_sync(lambda c: self._scan_headlines(c, url))
+    def get_headlines_from_topic(self, url, revalidate=False):
+        return self._run_sync(lambda c: self._scan_headlines(c, url, revalidate))
+    def _stream(self, coro_fn):
+        """Roda `coro_fn(crawler, emit)` no pool e gera cada item emitido, conforme chega."""
+        results = queue.Queue()
+        done = object()
+        fut = self.pool.spawn(lambda c: coro_fn(c, results.put))
+        fut.add_done_callback(lambda _: results.put(done))
+        while (item := results.get()) is not done:
+            yield item
+        fut.result()  # propaga erro do loop, se houver
+
+    def get_all_headlines(self, topics, concurrency=4):
+        """Varre todos os tópicos num crawler só; gera (tópico, manchetes) conforme cada um termina."""
+        if not topics: return iter(())  # sem tópicos não pega crawler (nem abre o Chromium)
+        return self._stream(lambda c, emit: self._scan_all(c, topics, concurrency, lambda t, h: emit((t, h))))
+
+    def iter_story_content(self, url, max_items=10):
+        """Como get_story_content, mas gera cada fonte assim que ela chega (ainda sem dedup)."""
+        return self._stream(lambda c, emit: self._deep_dive(c, url, max_items, on_result=emit))
+
+    def get_story_links(self, url, max_items=10):
+        return self._run_sync(lambda c: self._story_links(c, url, max_items))
+
     def get_story_content(self, url): return self._run_sync(lambda c: self._deep_dive(c, url, 10))
\ No newline at end of file
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Processamento em lote sem Streamlit: tópicos e histórias divididos entre vários
+processos (um navegador quente por processo), resultado em JSON lines.
+
+Cada linha tem `key` ("topic:<url>" / "story:<url>") e `status` ("ok" ou "error").
+Com --resume, as chaves que já saíram "ok" no arquivo de saída são puladas e o
+resultado novo é acrescentado no fim: um shard que caiu é refeito sem repetir o resto.
+
+Uso:
+    python batch.py --all-topics --dive 5 -o data/nightly.jsonl --workers 4
+    python batch.py --topic Brasil --topic Mundo --dossier > manchetes.jsonl
+    python batch.py --stories-file historias.txt --dossier -o out.jsonl --resume
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.util import Finalize
+
+# --- LADO DO PROCESSO FILHO ---
+_agg = None
+_opts = {}
+
+
+def _init_worker(opts):
+    """Um agregador por processo (pool de 1 navegador), reaproveitado por todos os shards."""
+    global _agg, _opts
+    from dotenv import load_dotenv
+    load_dotenv()
+    # stdout pode ser a saída JSONL: os prints do crawler vão para o stderr
+    sys.stdout = sys.stderr
+    from app import NewsAggregatorPro
+    _opts = opts
+    _agg = NewsAggregatorPro(pool_size=1)
+    Finalize(_agg, _agg.close, exitpriority=10)
+
+
+def _menu_job():
+    return _agg.get_menu_topics()
+
+
+def _source(a, content):
+    out = {k: a.get(k) for k in ("title", "source_domain", "url", "also_published_by") if a.get(k) is not None}
+    if content == "full": out["content"] = a.get("content")
+    elif content == "snippet": out["content"] = str(a.get("content") or "")[:300]
+    return out
+
+
+def _topic_job(job):
+    import refresh
+    news = _agg.get_headlines_from_topic(job["url"])
+    if not news: raise RuntimeError("nenhuma manchete")
+    diff = refresh.record_snapshot({"title": job["title"], "url": job["url"]}, news)
+    return {"topic": {"title": job["title"], "url": job["url"]}, "headlines": news,
+            "new": [it["url"] for it in diff["new"]]}
+
+
+def _story_job(job):
+    import dossier
+    sources = _agg.get_story_content(job["url"])
+    if not sources: raise RuntimeError("nenhuma fonte")
+    out = {"url": job["url"], "title": job.get("title"), "topic": job.get("topic"),
+           "sources": [_source(a, _opts["content"]) for a in sources]}
+    api_key = os.getenv("GEMINI_API_KEY")
+    if _opts["dossier"] and api_key:
+        text, mode = dossier.get_or_build_report(job["url"], job.get("title") or job["url"], sources, api_key)
+        out["dossier"] = {"mode": mode, "text": text}
+        if mode == "error": raise RuntimeError("falha na geração do dossiê")
+    return out
+
+
+def _run_shard(shard):
+    """Processa um shard; erro de um item vira linha "error" e não derruba os outros."""
+    records = []
+    for job in shard:
+        t = time.time()
+        try:
+            body = _topic_job(job) if job["type"] == "topic" else _story_job(job)
+            records.append({"key": job["key"], "type": job["type"], "status": "ok", **body,
+                            "elapsed": round(time.time() - t, 2)})
+        except Exception as e:
+            records.append({"key": job["key"], "type": job["type"], "status": "error", "url": job["url"],
+                            "error": f"{type(e).__name__}: {e}", "elapsed": round(time.time() - t, 2)})
+    return records
+
+
+# --- LADO DO PROCESSO PRINCIPAL ---
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def topic_job(topic):
+    return {"type": "topic", "key": f"topic:{topic['url']}", "url": topic["url"], "title": topic["title"]}
+
+
+def story_job(url, title=None, topic=None):
+    return {"type": "story", "key": f"story:{url}", "url": url, "title": title, "topic": topic}
+
+
+def done_keys(path):
+    """Chaves que já saíram com sucesso (linhas quebradas no fim do arquivo são ignoradas)."""
+    keys = set()
+    if not path or not os.path.exists(path): return keys
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try: rec = json.loads(line)
+            except ValueError: continue
+            if rec.get("status") == "ok": keys.add(rec["key"])
+    return keys
+
+
+def previous_dives(path, skip, topics, dive):
+    """Histórias das linhas de tópico já gravadas (para tópicos pulados pelo --resume)."""
+    wanted = {topic_job(t)["key"] for t in topics} & skip
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try: rec = json.loads(line)
+            except ValueError: continue
+            if rec.get("key") in wanted and rec.get("status") == "ok":
+                jobs += [story_job(it["url"], it["title"], rec["topic"]["title"]) for it in rec["headlines"][:dive]]
+    return jobs
+
+
+def shards_of(jobs, size):
+    return [jobs[i:i + size] for i in range(0, len(jobs), size)]
+
+
+class Runner:
+    def __init__(self, executor, out, skip, shard_size):
+        self.executor = executor
+        self.out = out
+        self.skip = skip
+        self.shard_size = shard_size
+        self.ok = self.failed = 0
+
+    def emit(self, rec):
+        self.out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self.out.flush()
+        if rec["status"] == "ok": self.ok += 1
+        else: self.failed += 1
+
+    def run(self, jobs, on_record=None):
+        """Distribui os jobs em shards entre os processos e grava cada resultado assim que chega."""
+        todo = [j for j in jobs if j["key"] not in self.skip]
+        if len(todo) < len(jobs): log(f"⏭️ {len(jobs) - len(todo)} já processados (resume)")
+        futures = {self.executor.submit(_run_shard, shard): shard for shard in shards_of(todo, self.shard_size)}
+        for fut in as_completed(futures):
+            try: records = fut.result()
+            except BrokenProcessPool: raise
+            except Exception as e:
+                # Shard inteiro perdido: fica sem linha "ok" e volta no próximo --resume
+                log(f"❌ Shard com {len(futures[fut])} itens falhou: {e}")
+                self.failed += len(futures[fut])
+                continue
+            for rec in records:
+                self.emit(rec)
+                if on_record: on_record(rec)
+            log(f"   📦 {self.ok} ok / {self.failed} falhas")
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Manchetes, fontes e dossiês em lote (JSON lines)")
+    ap.add_argument("--topic", action="append", default=[], help="nome de tópico do menu (repetível)")
+    ap.add_argument("--topic-url", action="append", default=[], help="URL de tópico (repetível)")
+    ap.add_argument("--all-topics", action="store_true", help="todos os tópicos do menu")
+    ap.add_argument("--story", action="append", default=[], help="URL de história (repetível)")
+    ap.add_argument("--stories-file", help="arquivo com uma URL de história por linha")
+    ap.add_argument("--dive", type=int, default=0, help="também processa as top-N histórias de cada tópico")
+    ap.add_argument("--dossier", action="store_true", help="gera/reaproveita o dossiê de cada história (GEMINI_API_KEY)")
+    ap.add_argument("--content", choices=["full", "snippet", "none"], default="full", help="texto das fontes na saída")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    ap.add_argument("--shard-size", type=int, default=4, help="itens por shard")
+    ap.add_argument("-o", "--output", help="arquivo .jsonl (padrão: stdout)")
+    ap.add_argument("--resume", action="store_true", help="pula as chaves já 'ok' no arquivo de saída")
+    args = ap.parse_args()
+    if args.resume and not args.output: ap.error("--resume precisa de -o/--output")
+    if not (args.topic or args.topic_url or args.all_topics or args.story or args.stories_file):
+        ap.error("informe tópicos (--topic/--topic-url/--all-topics) ou histórias (--story/--stories-file)")
+    return args
+
+
+def main():
+    args = parse_args()
+    stories = list(args.story)
+    if args.stories_file:
+        with open(args.stories_file, encoding="utf-8") as f:
+            stories += [l.strip() for l in f if l.strip() and not l.startswith("#")]
+
+    skip = done_keys(args.output) if args.resume else set()
+    out = open(args.output, "a" if args.resume else "w", encoding="utf-8") if args.output else sys.stdout
+    opts = {"dossier": args.dossier, "content": args.content}
+    if args.dossier and not os.getenv("GEMINI_API_KEY"):
+        from dotenv import load_dotenv
+        load_dotenv()
+        if not os.getenv("GEMINI_API_KEY"): log("⚠️ GEMINI_API_KEY ausente: saída sem dossiês")
+
+    started = time.time()
+    # spawn: cada processo sobe limpo (sem threads/event loop herdados) e abre o próprio navegador
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(args.workers, mp_context=ctx, initializer=_init_worker, initargs=(opts,)) as ex:
+            runner = Runner(ex, out, skip, args.shard_size)
+
+            topics = [{"title": u, "url": u} for u in args.topic_url]
+            if args.topic or args.all_topics:
+                menu = ex.submit(_menu_job).result()
+                if not menu: log("⚠️ Menu vazio")
+                wanted = {t.lower() for t in args.topic}
+                picked = [t for t in menu or [] if args.all_topics or t["title"].lower() in wanted]
+                missing = wanted - {t["title"].lower() for t in picked}
+                if missing: log(f"⚠️ Tópicos não encontrados no menu: {', '.join(sorted(missing))}")
+                topics += picked
+
+            story_jobs = [story_job(u) for u in stories]
+            if topics:
+                log(f"📂 {len(topics)} tópicos em {args.workers} processos")
+
+                def queue_stories(rec):
+                    if rec["status"] == "ok" and args.dive:
+                        story_jobs.extend(story_job(it["url"], it["title"], rec["topic"]["title"])
+                                          for it in rec["headlines"][:args.dive])
+
+                runner.run([topic_job(t) for t in topics], on_record=queue_stories)
+                if args.dive and skip:
+                    # Tópico pulado pelo resume: as histórias dele vêm da última varredura gravada
+                    story_jobs += previous_dives(args.output, skip, topics, args.dive)
+
+            unique = list({j["key"]: j for j in story_jobs}.values())
+            if unique:
+                log(f"🕵️ {len(unique)} histórias em {args.workers} processos")
+                runner.run(unique)
+    except BrokenProcessPool as e:
+        log(f"❌ Um processo morreu ({e}); rode de novo com --resume para completar")
+        sys.exit(2)
+    finally:
+        if out is not sys.stdout: out.close()
+
+    log(f"✅ {runner.ok} ok / {runner.failed} falhas em {time.time() - started:.0f}s")
+    if runner.failed: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cleaner.py em lote grande de páginas.
+
+Monta N páginas a partir das amostras de noticias_bypass.txt (chrome do leitor +
+rodapé fixo por domínio + corpo embaralhado) e mede vazão e redução de tamanho.
+
+Uso:
+    python benchmarks/bench_cleaner.py --pages 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from cleaner import Cleaner
+
+FOOTERS = {
+    "itatiaia.com.br": "Receba as notícias da Itatiaia no seu WhatsApp\nItatiaia © Todos os direitos reservados. Rádio Itatiaia Ltda.",
+    "diariodocomercio.com.br": "Diário do Comércio — o jornal de negócios de Minas Gerais desde 1932.\nAssine a newsletter",
+    "crusoe.com.br": "Crusoé: a revista que não tem medo de incomodar os poderosos do país.\nSiga a Crusoé",
+}
+
+
+def make_pages(n, seed=42):
+    raw = open(os.path.join(ROOT, "noticias_bypass.txt"), encoding="utf-8").read()
+    samples = [s.strip() for s in raw.split("=" * 40) if len(s.strip()) > 500]
+    rnd = random.Random(seed)
+    pages = []
+    for i in range(n):
+        dom = rnd.choice(list(FOOTERS))
+        lines = rnd.choice(samples).splitlines()
+        body = lines[:22] + rnd.sample(lines[22:], len(lines[22:]))
+        stamp = f"Atualizado em {rnd.randint(1, 28)}/12/2025 às {i % 24}h{i % 60:02d} — matéria {i}"
+        pages.append((dom, stamp + "\n" + "\n".join(body) + "\n" + FOOTERS[dom]))
+    return pages
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=2000)
+    args = ap.parse_args()
+
+    pages = make_pages(args.pages)
+    size_in = sum(len(t.encode()) for _, t in pages)
+    cleaner = Cleaner()
+
+    t = time.perf_counter()
+    out = [cleaner.clean(text, dom) for dom, text in pages]
+    dt = time.perf_counter() - t
+
+    size_out = sum(len(o.encode()) for o in out)
+    print(f"📄 {len(pages)} páginas, {size_in / 1e6:.1f} MB em {dt:.2f}s")
+    print(f"⚡ {len(pages) / dt:,.0f} páginas/s | {size_in / 1e6 / dt:.1f} MB/s")
+    print(f"✂️ Redução: {100 * (1 - size_out / size_in):.1f}% ({size_out / 1e6:.1f} MB)")
+    for dom, st in cleaner.stats().items():
+        print(f"   {dom}: {st['pages']} páginas, {st['boilerplate_lines']} linhas aprendidas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark das escritas e leituras do database.py num banco temporário.
+
+Mede p50/p95 por operação: salvar relatório com fontes, snapshots de manchetes,
+estado de histórias, redirects, histórico paginado, detalhes e busca FTS.
+
+Uso:
+    python benchmarks/bench_db.py --reports 500
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_db_")
+os.environ["NEWS_INTEL_DB"] = os.path.join(WORKDIR, "bench.db")
+import database as db
+
+WORDS = ("governo eleição mercado inflação juros saúde vacina futebol seleção chuva enchente ministro "
+         "congresso senado reforma imposto dólar bolsa petróleo clima tecnologia inteligência artificial").split()
+
+
+def text(rnd, n):
+    return " ".join(rnd.choice(WORDS) for _ in range(n))
+
+
+def article(rnd, i):
+    dom = rnd.choice(["g1.globo.com", "folha.uol.com.br", "estadao.com.br", "cnnbrasil.com.br", "uol.com.br"])
+    return {"title": text(rnd, 8), "source_domain": dom, "url": f"https://{dom}/materia/{i}", "content": text(rnd, 400)}
+
+
+def bench(results, name, fn, n):
+    times = []
+    for i in range(n):
+        t = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - t) * 1000)
+    times.sort()
+    results.append((name, n, statistics.median(times), times[int(0.95 * (len(times) - 1))], sum(times) / 1000))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=300)
+    ap.add_argument("--sources", type=int, default=8, help="fontes por relatório")
+    args = ap.parse_args()
+
+    rnd = random.Random(3)
+    results = []
+    news = [{"title": text(rnd, 10), "url": f"https://news.google.com/stories/S{i}", "image": None} for i in range(30)]
+    try:
+        db.ensure_schema()  # cria o schema fora da medição
+        bench(results, "save_full_report", lambda i: db.save_full_report(
+            f"https://news.google.com/stories/S{i}", text(rnd, 6), text(rnd, 600),
+            [article(rnd, i * 100 + j) for j in range(args.sources)]), args.reports)
+        bench(results, "save_headline_snapshot", lambda i: db.save_headline_snapshot(f"T{i % 10}", "Tópico", news), 200)
+        bench(results, "touch_stories", lambda i: db.touch_stories(f"T{i % 10}", news), 200)
+        bench(results, "save_resolved_urls", lambda i: db.save_resolved_urls(
+            [(f"articles/A{i}_{j}", f"https://g1.globo.com/{i}/{j}", "g1.globo.com") for j in range(10)]), 200)
+        bench(results, "get_latest_headlines", lambda i: db.get_latest_headlines(f"T{i % 10}", max_age=3600), 500)
+        bench(results, "get_story_states", lambda i: db.get_story_states(it['url'] for it in news), 500)
+        bench(results, "get_resolved_urls", lambda i: db.get_resolved_urls(f"articles/A{i % 200}_{j}" for j in range(10)), 500)
+        bench(results, "get_reports_page", lambda i: db.get_reports_page(50), 200)
+        bench(results, "get_report_details", lambda i: db.get_report_details(1 + i % args.reports), 500)
+        bench(results, "search_reports", lambda i: db.search_reports(rnd.choice(WORDS)), 200)
+        bench(results, "prune_snapshots", lambda i: db.prune_snapshots(), 5)
+        size = os.path.getsize(os.environ["NEWS_INTEL_DB"])
+    finally:
+        db.close_conn()
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    print(f"🗄️ {args.reports} relatórios x {args.sources} fontes, banco com {size / 1e6:.1f} MB")
+    print(f"   {'operação':<24} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'op/s':>9}")
+    for name, n, p50, p95, total in results:
+        print(f"   {name:<24} {n:>5} {p50:>9.3f} {p95:>9.3f} {n / total:>9,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark ponta a ponta do NewsAggregatorPro contra o servidor de replay (sem rede).
+
+Roda menu -> todos os tópicos -> deep dive das top-N histórias de cada tópico, duas
+passadas: "fria" (cache de páginas vazio) e "quente" (mesmo cache). Mede vazão,
+p50/p95 por etapa (via metrics.py) e pico de RSS do processo e dos filhos (Chromium).
+
+Precisa das fixtures gravadas (benchmarks/replay.py record) e do crawl4ai instalado.
+
+Uso:
+    python benchmarks/bench_e2e.py --stories 2 --latency 30
+    python benchmarks/bench_e2e.py --json out.json --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Banco e cache descartáveis: o benchmark não pode sujar (nem aproveitar) o news_intel.db
+WORKDIR = tempfile.mkdtemp(prefix="bench_e2e_")
+os.environ["NEWS_INTEL_DB"] = os.path.join(WORKDIR, "bench.db")
+
+import metrics
+from app import NewsAggregatorPro
+from fetch_cache import FetchCache
+from replay import FIXTURES, Fixtures, ReplayServer
+
+
+def peak_rss_mb():
+    """Pico de RSS (MB) do processo e dos filhos já encerrados. ru_maxrss é KB no Linux."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return round(own, 1), round(kids, 1)
+
+
+def run_pass(agg, stories, concurrency):
+    t = time.perf_counter()
+    topics = agg.get_menu_topics()
+    n_topics = n_headlines = n_stories = n_articles = 0
+    picked = []
+    for topic, news in agg.get_all_headlines(topics, concurrency=concurrency):
+        n_topics += 1
+        n_headlines += len(news or [])
+        picked += (news or [])[:stories]
+    for item in picked:
+        n_articles += len(agg.get_story_content(item['url']) or [])
+        n_stories += 1
+    dt = time.perf_counter() - t
+    return {"seconds": round(dt, 2), "topics": n_topics, "headlines": n_headlines, "stories": n_stories,
+            "articles": n_articles, "stories_per_s": round(n_stories / dt, 3) if dt else 0}
+
+
+def compare(result, baseline, tolerance):
+    """Etapas cujo p95 piorou mais que `tolerance` em relação ao baseline."""
+    worse = []
+    for stage, now in result["stages"].items():
+        ref = baseline.get("stages", {}).get(stage)
+        if ref and ref["p95_ms"] > 0 and now["p95_ms"] > ref["p95_ms"] * (1 + tolerance):
+            worse.append(f"{stage}: p95 {ref['p95_ms']} -> {now['p95_ms']} ms")
+    return worse
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", default=FIXTURES)
+    ap.add_argument("--stories", type=int, default=2, help="histórias por tópico no deep dive")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--latency", type=float, default=0.0, help="atraso simulado por requisição (ms)")
+    ap.add_argument("--fetch-mode", default="auto", choices=["auto", "http", "browser"])
+    ap.add_argument("--json", help="grava o resultado neste arquivo")
+    ap.add_argument("--baseline", help="JSON de uma rodada anterior para checar regressão de p95")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    args = ap.parse_args()
+
+    fixtures = Fixtures(args.fixtures)
+    if not fixtures.index: sys.exit(f"❌ Sem fixtures em {args.fixtures} (rode benchmarks/replay.py record)")
+
+    passes = {}
+    try:
+        with ReplayServer(fixtures, latency=args.latency) as server:
+            print(f"🎞️ Replay em {server.base_url} ({len(server.bodies)} páginas)")
+            cache = FetchCache(os.path.join(WORKDIR, "cache"))
+            with NewsAggregatorPro(base_url=server.base_url, cache=cache, fetch_mode=args.fetch_mode) as agg:
+                for name in ("fria", "quente"):
+                    served = server.hits
+                    passes[name] = run_pass(agg, args.stories, args.concurrency)
+                    passes[name]["pages_served"] = server.hits - served
+                    passes[name]["pages_per_s"] = round(passes[name]["pages_served"] / passes[name]["seconds"], 2)
+                    print(f"⏱️ Passada {name}: {passes[name]}")
+            misses = server.misses
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    own, kids = peak_rss_mb()
+    snap = metrics.summary()
+    result = {"passes": passes, "stages": snap["stages"], "domains": snap["domains"], "cache": snap["cache"],
+              "peak_rss_mb": own, "peak_rss_children_mb": kids, "replay_misses": misses,
+              "latency_ms": args.latency, "fetch_mode": args.fetch_mode}
+
+    print("\n📊 Etapas (p50 / p95 / máx ms, chamadas)")
+    for stage, st in sorted(result["stages"].items(), key=lambda kv: -kv[1]["p95_ms"]):
+        print(f"   {stage:<22} {st['p50_ms']:>9.1f} {st['p95_ms']:>9.1f} {st['max_ms']:>9.1f}  x{st['calls']}")
+    print(f"🧠 Pico de RSS: {own} MB (processo) | {kids} MB (filhos)")
+    if misses: print(f"⚠️ {misses} requisições sem fixture (404)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(result, f, ensure_ascii=False, indent=1)
+    if args.baseline:
+        worse = compare(result, json.load(open(args.baseline, encoding="utf-8")), args.tolerance)
+        for w in worse: print(f"❌ Regressão: {w}")
+        if worse: sys.exit(1)
+        print("✅ Sem regressão de p95 contra o baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark da extração de manchetes, menu e links de história (extract.py).
+
+Usa as páginas gravadas em benchmarks/fixtures quando existem; senão a página
+sintética de tests/test_extract_parity.py.
+
+Uso:
+    python benchmarks/bench_extract.py --repeat 50
+"""
+import argparse
+import gzip
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+sys.path.insert(0, HERE)
+from extract import clean_image_url, extract_headlines, extract_menu_topics, extract_story_links
+from replay import FIXTURES, Fixtures
+
+BASE = "https://news.google.com"
+
+
+def load_pages(root):
+    fx = Fixtures(root)
+    pages = []
+    for key, entry in fx.index.items():
+        if "file" in entry and key.startswith("/"):  # só páginas do Google News
+            with gzip.open(os.path.join(root, "pages", entry["file"]), "rt", encoding="utf-8") as f:
+                pages.append(f.read())
+    return pages
+
+
+def bench(name, fn, pages, repeat):
+    times = []
+    items = 0
+    for _ in range(repeat):
+        for html in pages:
+            t = time.perf_counter()
+            items += len(fn(html))
+            times.append((time.perf_counter() - t) * 1000)
+    times.sort()
+    mb = sum(len(h.encode()) for h in pages) * repeat / 1e6
+    total = sum(times) / 1000
+    print(f"   {name:<10} p50 {statistics.median(times):7.2f} ms | p95 {times[int(0.95 * (len(times) - 1))]:7.2f} ms"
+          f" | {mb / total:6.1f} MB/s | {items // repeat} itens")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", default=FIXTURES)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    pages = load_pages(args.fixtures)
+    if pages: print(f"📄 {len(pages)} páginas gravadas")
+    else:
+        from test_extract_parity import synthetic_page
+        pages = [synthetic_page()]
+        print("📄 Sem fixtures, usando a página sintética")
+
+    bench("headlines", lambda h: extract_headlines(h, BASE, clean_image_url), pages, args.repeat)
+    bench("menu", lambda h: extract_menu_topics(h, BASE), pages, args.repeat)
+    bench("story", lambda h: extract_story_links(h, BASE), pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Grava páginas reais (menu, tópicos, histórias, artigos) em fixtures e serve de volta
+num servidor HTTP local, para medir o pipeline sem rede.
+
+Layout das fixtures (benchmarks/fixtures/ por padrão):
+    index.json                      chave -> {"file": ..., "type": ...} ou {"redirect": ...}
+    pages/<sha1>.html.gz            corpo gravado
+
+Chaves: páginas do Google News ficam pelo caminho ("/topics/...?hl=..."); páginas de
+publisher pelo host + caminho ("g1.globo.com/politica/..."). No replay o Google News
+é http://127.0.0.1:PORTA e cada publisher vira http://<host>.localhost:PORTA (o Chromium
+resolve *.localhost para o loopback), então domínio por publisher continua valendo
+para o limite por domínio, o cache de redirects e as métricas.
+
+Uso:
+    python benchmarks/replay.py record --topics 4 --stories 3 --articles 6   # precisa de rede
+    python benchmarks/replay.py serve --port 8765 --latency 40               # sem rede
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+GOOGLE = "https://news.google.com"
+
+
+def _path_of(url):
+    parts = urlsplit(url)
+    return (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+
+class Fixtures:
+    def __init__(self, root=FIXTURES):
+        self.root = root
+        path = os.path.join(root, "index.json")
+        self.index = json.load(open(path, encoding="utf-8")) if os.path.exists(path) else {}
+
+    @staticmethod
+    def key(url):
+        """Chave de replay: caminho para o Google News, host + caminho para publishers."""
+        host = urlsplit(url).netloc.lower()
+        if host in ("", "news.google.com"): return _path_of(url)
+        return host + _path_of(url)
+
+    def add_page(self, url, html, content_type="text/html; charset=utf-8"):
+        # Links absolutos do Google News viram relativos, senão o replay escaparia para a rede
+        html = html.replace(GOOGLE, "")
+        name = hashlib.sha1(self.key(url).encode()).hexdigest() + ".html.gz"
+        os.makedirs(os.path.join(self.root, "pages"), exist_ok=True)
+        with gzip.open(os.path.join(self.root, "pages", name), "wt", encoding="utf-8") as f: f.write(html)
+        self.index[self.key(url)] = {"file": name, "type": content_type}
+
+    def add_redirect(self, url, target):
+        self.index[self.key(url)] = {"redirect": self.key(target)}
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    def load_bodies(self):
+        """Tudo descomprimido em memória: o servidor não pode ser o gargalo do benchmark."""
+        bodies = {}
+        for entry in self.index.values():
+            if "file" in entry and entry["file"] not in bodies:
+                with gzip.open(os.path.join(self.root, "pages", entry["file"]), "rb") as f:
+                    bodies[entry["file"]] = (f.read(), entry["type"])
+        return bodies
+
+
+class ReplayServer:
+    """Servidor HTTP local que devolve as fixtures; `latency` (ms) simula a rede."""
+
+    def __init__(self, fixtures=None, host="127.0.0.1", port=0, latency=0.0):
+        self.fixtures = fixtures or Fixtures()
+        self.bodies = self.fixtures.load_bodies()
+        self.latency = latency / 1000
+        self.hits = self.misses = 0
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                replay._serve(self)
+
+            def log_message(self, *args): pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _lookup(self, request):
+        host = request.headers.get("Host", "").rsplit(":", 1)[0].lower()
+        prefix = host[:-len(".localhost")] if host.endswith(".localhost") else ""
+        key = prefix + request.path
+        entry = self.fixtures.index.get(key)
+        if entry is None and "?" in key: entry = self.fixtures.index.get(key.split("?", 1)[0])
+        return entry
+
+    def _serve(self, request):
+        if self.latency: time.sleep(self.latency)
+        entry = self._lookup(request)
+        if entry is None:
+            self.misses += 1
+            request.send_response(404)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        self.hits += 1
+        if "redirect" in entry:
+            target = entry["redirect"]
+            if not target.startswith("/"):
+                host, _, path = target.partition("/")
+                target = f"http://{host}.localhost:{self.port}/{path}"
+            request.send_response(302)
+            request.send_header("Location", target)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        body, ctype = self.bodies[entry["file"]]
+        request.send_response(200)
+        request.send_header("Content-Type", ctype)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="replay-http")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self): return self.start()
+    def __exit__(self, *exc): self.stop()
+
+
+# --- GRAVAÇÃO (com rede) ---
+def record(root, topics=4, stories=3, articles=6):
+    from app import NewsAggregatorPro
+    from extract import clean_image_url, extract_headlines, extract_menu_topics, extract_story_links
+
+    fx = Fixtures(root)
+    scroll = "window.scrollBy(0, 1000); await new Promise(r => setTimeout(r, 400)); window.scrollBy(0, 1000);"
+
+    with NewsAggregatorPro() as agg:
+        def grab(url, **kw):
+            res = agg.pool.run(lambda c: c.arun(url=url, magic=True, headers=agg._get_headers(), **kw))
+            if not res.success or not res.html:
+                print(f"   ⚠️ Falhou: {url}")
+                return None
+            return res
+
+        res = grab(agg.menu_url, bypass_cache=True)
+        if res is None: sys.exit("❌ Menu não veio, nada gravado")
+        fx.add_page(agg.menu_url, res.html)
+        menu = extract_menu_topics(res.html, GOOGLE)[:topics]
+        print(f"🧭 Menu: {len(menu)} tópicos")
+
+        for topic in menu:
+            res = grab(topic['url'], js_code=scroll)
+            if res is None: continue
+            fx.add_page(topic['url'], res.html)
+            news = extract_headlines(res.html, GOOGLE, clean_image_url)[:stories]
+            print(f"📂 {topic['title']}: {len(news)} histórias")
+            for item in news:
+                res = grab(item['url'])
+                if res is None: continue
+                fx.add_page(item['url'], res.html)
+                for link in extract_story_links(res.html, GOOGLE)[:articles]:
+                    art = grab(link, word_count_threshold=200)
+                    if art is None: continue
+                    # art.url é a URL pedida (o link do Google); o publisher é o destino do redirect
+                    final = art.redirected_url or art.url
+                    if urlsplit(final).netloc.endswith("google.com"):
+                        fx.add_page(link, art.html)
+                    else:
+                        fx.add_page(final, art.html)
+                        fx.add_redirect(link, final)
+                fx.save()
+    fx.save()
+    print(f"✅ {len(fx.index)} entradas em {root}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fixtures e servidor de replay para benchmarks offline")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="grava páginas ao vivo (precisa de rede e crawl4ai)")
+    rec.add_argument("--topics", type=int, default=4)
+    rec.add_argument("--stories", type=int, default=3)
+    rec.add_argument("--articles", type=int, default=6)
+    srv = sub.add_parser("serve", help="serve as fixtures localmente")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--latency", type=float, default=0.0, help="atraso por requisição (ms)")
+    for p in (rec, srv): p.add_argument("--fixtures", default=FIXTURES)
+    args = ap.parse_args()
+
+    if args.cmd == "record":
+        record(args.fixtures, args.topics, args.stories, args.articles)
+        return
+    server = ReplayServer(Fixtures(args.fixtures), port=args.port, latency=args.latency).start()
+    print(f"🎞️ Replay em {server.base_url} ({len(server.bodies)} páginas). NEWS_BASE_URL={server.base_url}")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Compressão dos corpos de artigo guardados no banco (tabela article_bodies).
+
+Corpo é endereçado pelo sha256 do texto: a mesma matéria usada por vários
+dossiês é gravada uma vez só. zstd (com dicionário treinado em notícias, se
+houver) quando o `zstandard` está instalado; senão zlib. O codec fica gravado
+em cada linha, então bancos antigos continuam legíveis quando o codec muda.
+
+Uso:
+    python body_store.py stats
+    python body_store.py train --samples 2000   # dicionário zstd a partir dos corpos já salvos
+"""
+import argparse
+import hashlib
+import threading
+import zlib
+
+try:
+    import zstandard as zstd
+except ImportError:  # sem zstandard tudo continua funcionando com zlib
+    zstd = None
+
+ZSTD_LEVEL = 9
+ZLIB_LEVEL = 9
+DICT_SIZE = 110 * 1024
+
+# (Des)compressores zstd não são thread-safe: um conjunto por thread, chaveado pelo dicionário.
+# Só para chamadas de uma vez (compress/decompress); stream incremental tem contexto próprio.
+_local = threading.local()
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _cached(kind, dict_data, build):
+    cache = getattr(_local, kind, None)
+    if cache is None: cache = {}; setattr(_local, kind, cache)
+    obj = cache.get(dict_data)
+    if obj is None:
+        d = zstd.ZstdCompressionDict(dict_data) if dict_data else None
+        obj = cache[dict_data] = build(d)
+    return obj
+
+
+def compress(text, dict_id=None, dict_data=None):
+    """Devolve (codec, blob). Com dicionário só se o zstd estiver disponível."""
+    raw = text.encode("utf-8")
+    if zstd is None:
+        return "zlib", zlib.compress(raw, ZLIB_LEVEL)
+    comp = _cached("compressors", dict_data,
+                   lambda d: zstd.ZstdCompressor(level=ZSTD_LEVEL, dict_data=d) if d else zstd.ZstdCompressor(level=ZSTD_LEVEL))
+    return ("zstd-dict" if dict_data else "zstd"), comp.compress(raw)
+
+
+def _check(codec, dict_id, dict_data):
+    if zstd is None: raise RuntimeError(f"corpo gravado com {codec}: instale o pacote zstandard")
+    if codec == "zstd-dict" and not dict_data: raise RuntimeError(f"dicionário {dict_id} não encontrado")
+
+
+def _new_decompressor(d):
+    return zstd.ZstdDecompressor(dict_data=d) if d else zstd.ZstdDecompressor()
+
+
+def decompressobj(codec, dict_id=None, dict_data=None):
+    """Descompressor incremental (`.decompress(pedaço)`) para leitura em streaming.
+
+    Cada stream ganha um ZstdDecompressor novo (é barato): com o da thread, um
+    iter_article_body suspenso seria corrompido por outra leitura na mesma thread.
+    """
+    if codec == "zlib": return zlib.decompressobj()
+    _check(codec, dict_id, dict_data)
+    d = zstd.ZstdCompressionDict(dict_data) if codec == "zstd-dict" else None
+    return _new_decompressor(d).decompressobj()
+
+
+def decompress(codec, blob, dict_id=None, dict_data=None):
+    if codec == "zlib": return zlib.decompress(blob).decode("utf-8")
+    _check(codec, dict_id, dict_data)
+    dctx = _cached("decompressors", dict_data if codec == "zstd-dict" else None, _new_decompressor)
+    # decompressobj: blobs gravados por streaming podem não ter o tamanho no cabeçalho do frame
+    return dctx.decompressobj().decompress(blob).decode("utf-8")
+
+
+def train_dictionary(samples, size=DICT_SIZE):
+    """Dicionário zstd treinado nos textos; None se não houver zstd ou amostra suficiente."""
+    if zstd is None or len(samples) < 50: return None
+    return zstd.train_dictionary(size, [s.encode("utf-8") for s in samples]).as_bytes()
+
+
+def main():
+    import database as db
+
+    ap = argparse.ArgumentParser(description="Corpos de artigo comprimidos no news_intel.db")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats")
+    tr = sub.add_parser("train")
+    tr.add_argument("--samples", type=int, default=2000)
+    args = ap.parse_args()
+
+    if args.cmd == "train":
+        dict_id = db.train_body_dictionary(args.samples)
+        print(f"📚 Dicionário {dict_id} salvo; corpos novos já usam ele" if dict_id else "⚠️ Sem zstandard ou corpos suficientes")
+    st = db.body_store_stats()
+    ratio = st['stored_bytes'] / st['raw_bytes'] if st['raw_bytes'] else 0
+    print(f"🗜️ {st['bodies']} corpos ({st['references']} referências), {st['raw_bytes'] / 1e6:.1f} MB -> "
+          f"{st['stored_bytes'] / 1e6:.1f} MB ({ratio:.0%}) | codecs: {st['codecs']}")
+
+
+if __name__ == "__main__":
+    main()
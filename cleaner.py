@@ -0,0 +1,126 @@
+"""Limpeza do markdown crawleado antes de ir pro prompt e pro banco.
+
+Duas camadas:
+1. Lixo conhecido (chrome de leitor tipo smry.ai, botões de compartilhar, "leia também",
+   contadores, linhas só de links) numa regex combinada, compilada uma vez.
+2. Boilerplate aprendido por domínio: linhas que se repetem em muitas páginas do mesmo
+   site (rodapé, assinatura do autor, aviso de cookies) via frequência de hash de linha.
+"""
+import hashlib
+import re
+import threading
+from collections import Counter, defaultdict
+
+# Linhas inteiras que são só interface (ver noticias_bypass.txt)
+JUNK_LINES = [
+    "voice-to-text i use daily", "— michael, creator of smry", "bypass ai detectors and write like a human",
+    "advertise", "go pro", "reader", "original", "iframe", "summary", "share", "copy page", "toggle theme",
+    "smry fast", "smry slow", "wayback", "jina.ai", "publicidade", "continua após a publicidade",
+    "compartilhe", "compartilhar", "copiar link", "ouvir", "ouça", "salvar", "imprimir",
+]
+JUNK_PATTERNS = [
+    r"[·•★|\-–—*]+",                      # separadores soltos
+    r"\d+(?:[.,]\d+)?\s*[km]?",           # contadores (4.6K, 2.1K)
+    r"\d+\s*min(?:utos?)?\s*(?:read|de leitura)",
+    r"!?\[[^\]]*\]\([^)]*\)(?:\s*!?\[[^\]]*\]\([^)]*\))*",  # linha só de links/imagens
+]
+# Chamadas de boilerplate: só contam no INÍCIO de uma linha curta ("Siga a Crusoé", "Leia também: ...").
+# Nome de rede social sozinho não condena nada: "Telegram é bloqueado no Brasil" é notícia.
+JUNK_PREFIXES = [
+    "leia também", "leia mais", "veja também", "veja mais", "siga", "assine", "inscreva-se", "cadastre-se",
+    "receba as notícias", "receba as principais notícias", "clique aqui", "baixe o app", "baixe o aplicativo",
+    "entre no canal", "participe do canal",
+]
+# Avisos de rodapé que aparecem em qualquer ponto de uma linha curta
+JUNK_NOTICES = [
+    "todos os direitos reservados", "usamos cookies", "utilizamos cookies", "este site usa cookies",
+    "este site utiliza cookies",
+]
+# Linha curta com link cujo texto é chamada ("Receba no [WhatsApp](...)", "[Assine](...) a newsletter")
+CTA_WORDS = ["siga", "assine", "inscreva-se", "receba", "clique", "baixe", "entre no", "participe do", "newsletter"]
+SHORT_LINE = 90
+
+_JUNK_LINE = re.compile(
+    r"^\s*(?:[*\-#>]\s*)*(?:" + "|".join([re.escape(t) for t in JUNK_LINES] + JUNK_PATTERNS) + r")\s*$",
+    re.IGNORECASE,
+)
+_JUNK_SHORT = re.compile(
+    r"^\s*(?:[*\-#>]\s*)*[*\[]*(?:" + "|".join(re.escape(t) for t in JUNK_PREFIXES) + r")(?!\w)"
+    r"|(?<!\w)(?:" + "|".join(re.escape(t) for t in JUNK_NOTICES) + r")(?!\w)",
+    re.IGNORECASE,
+)
+_CTA_WORD = re.compile(r"(?<!\w)(?:" + "|".join(re.escape(t) for t in CTA_WORDS) + r")(?!\w)", re.IGNORECASE)
+_LINK = re.compile(r"\]\([^)]*\)|https?://")
+_BLANKS = re.compile(r"\n{3,}")
+
+
+def _line_key(line):
+    return hashlib.blake2b(line.strip().lower().encode(), digest_size=8).digest()
+
+
+class Cleaner:
+    """Limpa markdown e aprende o boilerplate de cada domínio com o tempo.
+
+    Uma linha vira boilerplate do domínio quando aparece em pelo menos `min_pages`
+    páginas e em `min_ratio` das páginas vistas daquele site.
+    """
+
+    def __init__(self, min_pages=3, min_ratio=0.5, min_line=15, max_keys_per_domain=20000):
+        self.min_pages = min_pages
+        self.min_ratio = min_ratio
+        self.min_line = min_line
+        self.max_keys = max_keys_per_domain
+        self._freq = defaultdict(Counter)
+        self._pages = Counter()
+        self._seen_docs = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def observe(self, domain, lines):
+        keys = {_line_key(l) for l in lines if len(l.strip()) >= self.min_line}
+        doc = hashlib.blake2b(b"".join(sorted(keys)), digest_size=8).digest()
+        with self._lock:
+            if doc in self._seen_docs[domain]: return  # mesma página de novo (cache) não conta duas vezes
+            self._seen_docs[domain].add(doc)
+            self._pages[domain] += 1
+            freq = self._freq[domain]
+            freq.update(keys)
+            if len(freq) > self.max_keys:
+                # Mantém só as linhas mais repetidas (são as candidatas a boilerplate)
+                self._freq[domain] = Counter(dict(freq.most_common(self.max_keys // 2)))
+
+    def _threshold(self, domain):
+        """Quantas páginas uma linha precisa aparecer para contar como boilerplate (None = ainda cedo)."""
+        pages = self._pages[domain]
+        if pages < self.min_pages: return None
+        return max(self.min_pages, self.min_ratio * pages)
+
+    def clean(self, text, domain=None):
+        if not text: return ""
+        lines = str(text).splitlines()
+        need = None
+        if domain:
+            self.observe(domain, lines)
+            with self._lock:
+                need = self._threshold(domain)
+                freq = self._freq[domain]
+
+        kept = []
+        for line in lines:
+            s = line.strip()
+            if not s:
+                kept.append("")
+                continue
+            if _JUNK_LINE.match(s): continue
+            if len(s) < SHORT_LINE and (_JUNK_SHORT.search(s) or (_LINK.search(s) and _CTA_WORD.search(s))): continue
+            if need and len(s) >= self.min_line and freq[_line_key(s)] >= need: continue
+            kept.append(line.rstrip())
+        return _BLANKS.sub("\n\n", "\n".join(kept)).strip()
+
+    def stats(self):
+        with self._lock:
+            out = {}
+            for d, pages in self._pages.items():
+                need = self._threshold(d)
+                out[d] = {"pages": pages, "boilerplate_lines": sum(1 for n in self._freq[d].values() if need and n >= need)}
+            return out
+
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+
+HEALTH_URL = "raw:<html><body>ok</body></html>"
+
+
+class _Slot:
+    """Uma vaga do pool: um navegador quente e seus contadores."""
+
+    def __init__(self, idx):
+        self.idx = idx
+        self.crawler = None
+        self.pages = 0
+        self.errors = 0
+        self.last_used = 0.0
+
+
+class _PooledCrawler:
+    """Proxy do AsyncWebCrawler que conta páginas e erros da vaga."""
+
+    def __init__(self, slot):
+        self._slot = slot
+
+    def __getattr__(self, name):
+        return getattr(self._slot.crawler, name)
+
+    async def arun(self, *args, **kwargs):
+        self._slot.pages += 1
+        try:
+            return await self._slot.crawler.arun(*args, **kwargs)
+        except Exception:
+            self._slot.errors += 1
+            raise
+
+
+class CrawlerPool:
+    """Pool de navegadores (AsyncWebCrawler) vivos num event loop de fundo.
+
+    Os crawlers nascem sob demanda, são reaproveitados entre chamadas e reciclados
+    depois de `max_pages` páginas, após erro seguido de health check ruim ou se
+    ficarem parados demais sem responder.
+    """
+
+    def __init__(self, size=2, max_pages=100, health_check_interval=60, start_timeout=60):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.health_check_interval = health_check_interval
+        self.start_timeout = start_timeout
+        self._loop = None
+        self._thread = None
+        self._idle = None
+        self._slots = []
+        self._lock = threading.Lock()
+        self.recycled = 0
+
+    # --- LOOP DE FUNDO ---
+    @property
+    def loop(self):
+        self._ensure_loop()
+        return self._loop
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive(): return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def serve():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=serve, name="crawler-pool", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            asyncio.run_coroutine_threadsafe(self._setup(), loop).result()
+
+    async def _setup(self):
+        self._idle = asyncio.Queue()
+        self._slots = [_Slot(i) for i in range(self.size)]
+        for slot in self._slots: self._idle.put_nowait(slot)
+
+    # --- CICLO DE VIDA DO NAVEGADOR ---
+    async def _start(self, slot):
+        # Import tardio: crawl4ai puxa Playwright e leva segundos; só quem abre navegador paga
+        from crawl4ai import AsyncWebCrawler
+        crawler = AsyncWebCrawler(verbose=False)
+        await asyncio.wait_for(crawler.start(), self.start_timeout)
+        slot.crawler, slot.pages, slot.errors = crawler, 0, 0
+        slot.last_used = time.monotonic()
+
+    async def _stop(self, slot):
+        if slot.crawler is None: return
+        try: await slot.crawler.close()
+        except Exception as e: print(f"   ⚠️ Erro ao fechar navegador {slot.idx}: {e}")
+        slot.crawler = None
+
+    async def _recycle(self, slot):
+        await self._stop(slot)
+        self.recycled += 1
+        await self._start(slot)
+
+    async def _healthy(self, slot):
+        try:
+            res = await asyncio.wait_for(slot.crawler.arun(url=HEALTH_URL), 15)
+            return bool(res and res.success)
+        except Exception:
+            return False
+
+    async def _acquire(self):
+        slot = await self._idle.get()
+        try:
+            if slot.crawler is None:
+                await self._start(slot)
+            elif slot.pages >= self.max_pages:
+                print(f"   ♻️ Reciclando navegador {slot.idx} ({slot.pages} páginas)")
+                await self._recycle(slot)
+            elif time.monotonic() - slot.last_used > self.health_check_interval and not await self._healthy(slot):
+                print(f"   ♻️ Navegador {slot.idx} não respondeu, reiniciando")
+                await self._recycle(slot)
+        except Exception:
+            await self._stop(slot)
+            self._idle.put_nowait(slot)
+            raise
+        return slot
+
+    async def _release(self, slot):
+        try:
+            # Houve exceção dentro do arun: pode ter sido crash do Chromium
+            if slot.errors and slot.crawler is not None and not await self._healthy(slot):
+                print(f"   💥 Navegador {slot.idx} caiu, descartando")
+                await self._stop(slot)
+            slot.errors = 0
+            slot.last_used = time.monotonic()
+        finally:
+            self._idle.put_nowait(slot)
+
+    @asynccontextmanager
+    async def crawler(self):
+        """Empresta um crawler do pool (usar de dentro do loop do pool)."""
+        slot = await self._acquire()
+        try:
+            yield _PooledCrawler(slot)
+        finally:
+            await self._release(slot)
+
+    async def _with_crawler(self, coro_fn):
+        async with self.crawler() as crawler:
+            return await coro_fn(crawler)
+
+    # --- API SÍNCRONA ---
+    def submit(self, coro):
+        """Agenda uma corrotina no loop do pool e devolve um concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def spawn(self, coro_fn):
+        """Agenda `coro_fn(crawler)` com um crawler emprestado, sem esperar."""
+        return self.submit(self._with_crawler(coro_fn))
+
+    def run(self, coro_fn, timeout=None):
+        """Roda `coro_fn(crawler)` com um crawler emprestado e espera o resultado."""
+        return self.spawn(coro_fn).result(timeout)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "alive": sum(1 for s in self._slots if s.crawler is not None),
+            "idle": self._idle.qsize() if self._idle else 0,
+            "pages": {s.idx: s.pages for s in self._slots},
+            "recycled": self.recycled,
+        }
+
+    async def _shutdown(self):
+        for slot in self._slots: await self._stop(slot)
+
+    def close(self):
+        with self._lock:
+            if not (self._thread and self._thread.is_alive()): return
+            loop = self._loop
+        try: asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(30)
+        except Exception as e: print(f"   ⚠️ Erro ao encerrar pool: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(5)
+        loop.close()
+        self._thread = self._loop = None
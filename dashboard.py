@@ -1,12 +1,24 @@
 import streamlit as st
 from dotenv import load_dotenv
 import os
-from google import genai
-from app import NewsAggregatorPro
+import threading
 import database as db
+import dossier
+import refresh
+import metrics
+from dedup import dedup_articles
 
 load_dotenv()
 API_KEY = os.getenv("GEMINI_API_KEY")
+# Quantas fontes esperar antes de começar a gerar o dossiê
+STREAM_QUORUM = int(os.getenv("DOSSIER_QUORUM", "4"))
+# Idade máxima (s) do que o worker deixou no banco para ser servido sem crawl ao vivo
+SNAPSHOT_MAX_AGE = int(os.getenv("SNAPSHOT_MAX_AGE", "1800"))
+REPORT_MAX_AGE = int(os.getenv("REPORT_MAX_AGE", "7200"))
+# Painel de debug com tempos por etapa, domínios e cache (METRICS_PANEL=1)
+METRICS_PANEL = os.getenv("METRICS_PANEL") == "1"
+# Quanto o grid espera pelas miniaturas que faltam; o resto aparece no próximo render
+THUMB_WAIT = float(os.getenv("THUMB_WAIT", "1.0"))
 
 st.set_page_config(page_title="News Intel AI", page_icon="🧿", layout="wide")
 
@@ -46,26 +58,127 @@ st.markdown("""
 IMG_PLACEHOLDER = "https://fonts.gstatic.com/s/i/productlogos/news/v6/web-96dp/logo_strip.png"
 BACKUP_BR = "https://news.google.com/topics/CAAqJggKIiBDQkFTRWvfQUwyXzhTblF5Y0c1bEpXNnRNU0FBUW9BQVAB?hl=pt-BR&gl=BR&ceid=BR%3Apt-419"
 
-def generate_report(articles, api_key):
-    if not articles: return None
-    client = genai.Client(api_key=api_key)
-    txt = "".join([f"## {a['source_domain']}\n{a['title']}\n{a['content'][:2500]}\n" for a in articles])
-    prompt = f"Analista de Inteligência.\nGere dossiê executivo:\n\n{txt}"
-    try: return client.models.generate_content(model='gemini-2.5-flash-lite', contents=prompt).text
-    except: return "Erro na geração."
+@st.cache_resource
+def init_storage():
+    # Schema do banco criado uma vez por processo, não a cada rerun do script
+    db.ensure_schema()
+    return db.DB_NAME
+
+@st.cache_resource
+def get_aggregator():
+    # Um agregador (e seu pool de navegadores) por processo, compartilhado entre sessões.
+    # Import aqui: app -> crawl4ai/httpx/lxml só carregam quando alguém precisa crawlear
+    from app import NewsAggregatorPro
+    return NewsAggregatorPro()
+
+@st.cache_resource
+def get_thumbs():
+    # Miniaturas em disco/memória compartilhadas entre sessões (data/thumbs)
+    from image_cache import ImageCache
+    return ImageCache(root=os.getenv("THUMB_CACHE_DIR", "data/thumbs"))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_menu():
+    # Snapshot do menu lido do banco no máximo a cada 5 min por processo, não por sessão
+    return db.get_latest_menu(max_age=6 * 3600)
+
+def load_headlines(topic):
+    # Banco primeiro (snapshot do worker); crawl ao vivo só se não houver um recente
+    news = db.get_latest_headlines(topic['url'], max_age=SNAPSHOT_MAX_AGE)
+    if news is None:
+        news = get_aggregator().get_headlines_from_topic(topic['url'])
+        if news: refresh.record_snapshot(topic, news)
+    return news
+
+def warm_tabs(topics, warm):
+    # Roda numa thread: só mexe no dict `warm`, nunca no st.session_state
+    try:
+        live, images = [], []
+        for topic in topics:
+            news = db.get_latest_headlines(topic['url'], max_age=SNAPSHOT_MAX_AGE)
+            if news is None: live.append(topic)
+            else:
+                warm['news'][f"news_{topic['title']}"] = news
+                images += [item.get('image') for item in news]
+        # Tudo veio do banco: nem importa o app nem sobe o navegador
+        if live:
+            for topic, news in get_aggregator().get_all_headlines(live):
+                if news: refresh.record_snapshot(topic, news)
+                warm['news'][f"news_{topic['title']}"] = news
+                images += [item.get('image') for item in news or []]
+        # Miniaturas das abas aquecidas já ficam no cache local antes do clique
+        get_thumbs().get_many(images)
+    except Exception as e:
+        print(f"⚠️ Erro no pré-carregamento: {e}")
+    finally:
+        warm['done'] = True
+
+def finish_dossier(item, quorum, stream, late):
+    # Roda numa thread: escoa as fontes que chegam depois do quórum, completa o dossiê
+    # pelo caminho incremental e só então salva (um relatório por história aberta)
+    try:
+        for art in stream: late['sources'].append(art)
+        articles = dedup_articles(quorum['sources'] + late['sources'])
+        if quorum['text'] is None:
+            # O stream do quórum falhou: gera (e salva) com todas as fontes
+            text, mode = dossier.get_or_build_report(item['url'], item['title'], articles, API_KEY)
+        else:
+            text, mode = dossier.finish_report(item['url'], item['title'], quorum['text'], quorum['used'],
+                                               articles, API_KEY, saved=quorum['mode'] == "cache")
+        if mode not in ("error", "unchanged"): late['text'] = text
+    except Exception as e:
+        print(f"⚠️ Erro ao completar o dossiê: {e}")
+    finally:
+        late['done'] = True
+
+@st.fragment(run_every=2)
+def watch_late(ckey):
+    # Lista as fontes atrasadas e troca o dossiê quando a versão completa fica pronta
+    late = st.session_state[f"late_{ckey}"]
+    if late['sources']:
+        st.caption(f"Fontes que chegaram depois ({len(late['sources'])}):")
+        for art in list(late['sources']):
+            st.markdown(f"- [{art['title']}]({art['url']}) · {art['source_domain']}")
+    if late['done']:
+        del st.session_state[f"late_{ckey}"]
+        if late['text']: st.session_state[ckey] = late['text']
+        st.rerun(scope="app")
+    else:
+        st.caption("⏳ Completando o dossiê com as fontes restantes...")
+
+@st.fragment(run_every=2)
+def watch_warmup():
+    # Recarrega a página quando a thread de fundo entrega um tópico novo
+    warm = st.session_state['warm']
+    if warm['news'] or warm['done']:
+        st.rerun(scope="app")
 
 st.title("🧿 News Intel AI")
 if not API_KEY: st.error("Falta API Key"); st.stop()
+init_storage()
 
 if 'menu_data' not in st.session_state:
     with st.spinner("Conectando..."):
-        agg = NewsAggregatorPro()
-        menu = agg.get_menu_topics()
+        menu = cached_menu()
+        if not menu:
+            menu = get_aggregator().get_menu_topics()
+            if menu: db.save_menu_snapshot(menu)
         if not menu:
             menu = [{"title": "Brasil", "url": BACKUP_BR}, {"title": "Mundo", "url": BACKUP_BR}]
         st.session_state['menu_data'] = menu
 
 menu = st.session_state['menu_data']
+
+# Pré-carrega as outras abas em segundo plano (a primeira carrega logo abaixo)
+if 'warm' not in st.session_state:
+    st.session_state['warm'] = {"news": {}, "done": False}
+    threading.Thread(target=warm_tabs, args=(menu[1:], st.session_state['warm']), daemon=True).start()
+warm = st.session_state['warm']
+for key in list(warm['news']):
+    st.session_state.setdefault(key, warm['news'].pop(key))
+if not warm['done']:
+    watch_warmup()
+
 tabs = st.tabs([m['title'] for m in menu])
 
 for i, tab in enumerate(tabs):
@@ -76,38 +189,46 @@ for i, tab in enumerate(tabs):
         # Auto-Load
         if i == 0 and t_key not in st.session_state:
             with st.spinner(f"Baixando {topic['title']}..."):
-                agg = NewsAggregatorPro()
-                st.session_state[t_key] = agg.get_headlines_from_topic(topic['url'])
+                st.session_state[t_key] = load_headlines(topic)
                 st.rerun()
 
         if t_key not in st.session_state:
             if st.button(f"📥 Carregar {topic['title']}", key=f"load_{i}"):
                 with st.spinner("Buscando..."):
-                    agg = NewsAggregatorPro()
-                    st.session_state[t_key] = agg.get_headlines_from_topic(topic['url'])
+                    st.session_state[t_key] = load_headlines(topic)
                     st.rerun()
         
         elif st.session_state[t_key]:
             news = st.session_state[t_key]
             
             if st.button("🔄 Atualizar", key=f"re_{i}"):
-                del st.session_state[t_key]
+                # Refresh incremental: diff contra o snapshot anterior, destaca só o que mudou
+                with st.spinner("Atualizando..."):
+                    fresh, diff = refresh.refresh_topic(get_aggregator(), topic)
+                if fresh:
+                    st.session_state[t_key] = fresh
+                    st.session_state[f"new_{t_key}"] = {it['url'] for it in diff['new']}
+                    st.toast(refresh.describe(diff))
                 st.rerun()
+            new_urls = st.session_state.get(f"new_{t_key}", set())
             
             st.write("")
+            # Baixa (em paralelo, uma vez) e reduz as imagens da aba; o grid lê do cache local
+            thumbs = get_thumbs().get_many([item.get('image') for item in news], wait=THUMB_WAIT)
             cols = st.columns(4)
             for j, item in enumerate(news):
                 with cols[j % 4]:
                     with st.container():
-                        img_url = item.get('image')
-                        if not img_url: img_url = IMG_PLACEHOLDER
+                        img = thumbs.get(item.get('image')) or IMG_PLACEHOLDER
                         
                         try:
                             # CORREÇÃO: width="stretch" (Obrigatório no Streamlit novo)
-                            st.image(img_url, width="stretch")
+                            st.image(img, width="stretch")
                         except:
                             st.image(IMG_PLACEHOLDER, width="stretch")
 
+                        if item['url'] in new_urls:
+                            st.markdown('<span class="cluster-tag">🆕 Nova</span>', unsafe_allow_html=True)
                         if item.get('is_cluster'):
                             st.markdown('<span class="cluster-tag">⚡ Cobertura</span>', unsafe_allow_html=True)
                         
@@ -116,8 +237,44 @@ for i, tab in enumerate(tabs):
                             st.session_state['view'] = 'reader'
                             st.rerun()
 
+# --- ACERVO: busca nos relatórios salvos ---
+if st.session_state.get('view') != 'reader':
+    with st.sidebar:
+        st.header("🔎 Acervo")
+        q = st.text_input("Buscar relatórios", key="search_q", placeholder="ex.: eleição, reuters.com")
+        with st.expander("Filtros"):
+            dom = st.text_input("Domínio da fonte", key="search_dom")
+            period = st.date_input("Período", value=(), key="search_period")
+        if q:
+            d_from = str(period[0]) if len(period) > 0 else None
+            d_to = str(period[-1]) if len(period) > 0 else None
+            hits = db.search_reports(q, domain=dom.strip() or None, date_from=d_from, date_to=d_to)
+            if not hits: st.caption("Nada encontrado.")
+            for h in hits:
+                st.markdown(f"**{h['topic_name']}** · {h['created_at'][:10]}  \n{h['snippet']}")
+                if st.button("Abrir", key=f"hit_{h['id']}"):
+                    st.session_state['archive_id'] = h['id']
+                    st.session_state['view'] = 'archive'
+                    st.rerun()
+
+if st.session_state.get('view') == 'archive':
+    report, sources = db.get_report_details(st.session_state['archive_id'])
+    if report:
+        st.divider()
+        st.subheader(f"🗄️ {report['topic_name']} ({report['created_at'][:16]})")
+        if st.button("❌ Fechar arquivo"):
+            st.session_state['view'] = None
+            st.rerun()
+        st.markdown(f'<div class="ai-box">{report["summary_text"]}</div>', unsafe_allow_html=True)
+        for k, src in enumerate(sources):
+            st.markdown(f"- [{src['title']}]({src['url']}) · {src['source_domain']}")
+            # Texto completo guardado no banco (comprimido), lido em fluxo só quando pedido
+            if src.get('body_hash') and st.button("📄 Texto completo", key=f"body_{k}"):
+                st.write_stream(db.iter_article_body(src['body_hash']))
+
 if st.session_state.get('view') == 'reader':
     item = st.session_state['reading_item']
+    ai_slot = st.empty()  # área principal: o dossiê vai aparecendo aqui enquanto é gerado
     with st.sidebar:
         st.header("🕵️ Dossiê")
         st.info(f"{item['title']}")
@@ -130,25 +287,62 @@ if st.session_state.get('view') == 'reader':
         ckey = f"rep_{item['url']}"
         
         if ckey not in st.session_state:
-            agg = NewsAggregatorPro()
+            # Dossiê pré-gerado pelo worker: só leitura de banco
+            cached = db.get_latest_cached_report(item['url'], max_age=REPORT_MAX_AGE)
+            if cached:
+                st.session_state[ckey] = cached['summary_text']
+                status.update(label="Pronto! (do banco)", state="complete")
+
+        if ckey not in st.session_state:
             status.write("Baixando fontes...")
-            content = agg.get_story_content(item['url'])
-            if content:
-                status.write("Gerando IA...")
-                rep = generate_report(content, API_KEY)
+            sources_box = st.container()
+            sources = []
+            stream = get_aggregator().iter_story_content(item['url'])
+            # Cada fonte aparece assim que chega; a IA começa quando bate o quórum
+            for art in stream:
+                sources.append(art)
+                sources_box.markdown(f"- [{art['title']}]({art['url']}) · {art['source_domain']}")
+                if len(sources) >= STREAM_QUORUM: break
+            if sources:
+                used = dedup_articles(sources)
+                status.write(f"Gerando IA com {len(used)} fontes...")
+                # Nada é salvo aqui: o dossiê final (com as fontes atrasadas) é salvo uma vez só
+                mode, chunks = dossier.stream_report(item['url'], item['title'], used, API_KEY, save=False)
+                if mode == "cache": status.write("♻️ Dossiê reaproveitado do banco")
+                elif mode == "incremental": status.write("🧩 Dossiê atualizado só com as fontes novas")
+                rep = ""
+                for chunk in chunks:
+                    rep += chunk
+                    ai_slot.markdown(f'<div class="ai-box">{rep}</div>', unsafe_allow_html=True)
                 st.session_state[ckey] = rep
-                
-                # Bloco seguro de salvamento
-                try:
-                    # Garantimos que a 'url' existe agora no app.py
-                    db.save_full_report(item['url'], item['title'], rep, content)
-                except Exception as e:
-                    print(f"⚠️ Erro ao salvar no DB (mas vou mostrar o relatório): {e}")
-                
+
+                # O resto das fontes continua chegando em segundo plano: sem bloquear a tela,
+                # uma thread espera o stream acabar e atualiza o dossiê com elas
+                late = st.session_state[f"late_{ckey}"] = {"sources": [], "text": None, "done": False}
+                quorum = {"sources": sources, "used": used, "mode": mode,
+                          "text": None if dossier.ERROR_TEXT in rep else rep}
+                threading.Thread(target=finish_dossier, args=(item, quorum, stream, late), daemon=True).start()
                 status.update(label="Pronto!", state="complete")
             else:
                 status.update(label="Erro", state="error")
                 st.error("Falha ao ler fontes.")
     
+    if f"late_{ckey}" in st.session_state:
+        with st.sidebar: watch_late(ckey)
     if ckey in st.session_state:
-        st.markdown(f'<div class="ai-box">{st.session_state[ckey]}</div>', unsafe_allow_html=True)
\ No newline at end of file
+        ai_slot.markdown(f'<div class="ai-box">{st.session_state[ckey]}</div>', unsafe_allow_html=True)
+
+# --- DEBUG: onde o tempo está indo (métricas do processo inteiro, todas as sessões) ---
+if METRICS_PANEL:
+    with st.sidebar.expander("🐞 Métricas"):
+        snap = metrics.summary()
+        st.caption("Etapas (últimas execuções)")
+        st.dataframe([{"etapa": k, **v} for k, v in sorted(snap['stages'].items())], hide_index=True)
+        if snap['domains']:
+            st.caption("Domínios")
+            st.dataframe([{"domínio": k, **v} for k, v in sorted(snap['domains'].items())], hide_index=True)
+        st.caption("Cache de páginas")
+        st.json(snap['cache'])
+        st.caption("Miniaturas")
+        st.json(get_thumbs().stats())
+        st.download_button("⬇️ Prometheus", metrics.render_prometheus(), file_name="news_intel.prom")
@@ -1,14 +1,47 @@
+import codecs
+import os
+import re
 import sqlite3
 import json
+import queue
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+import metrics
+import body_store
 
-DB_NAME = "news_intel.db"
+DB_NAME = os.getenv("NEWS_INTEL_DB", "news_intel.db")
 
-def init_db():
-    """Cria as tabelas se não existirem."""
-    conn = sqlite3.connect(DB_NAME)
+# Ajustes para várias sessões do Streamlit lendo/escrevendo ao mesmo tempo
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",        # leitores não bloqueiam o escritor
+    "PRAGMA synchronous=NORMAL",      # seguro com WAL e bem mais rápido que FULL
+    "PRAGMA busy_timeout=5000",       # espera o lock em vez de estourar "database is locked"
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",       # ~16 MB de cache de páginas por conexão
+    "PRAGMA mmap_size=134217728",
+)
+
+MENU_KEY = "__menu__"
+
+# unicode61 sem acentos: "eleicao" acha "eleição"
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Conexões ociosas guardadas por banco. O Streamlit roda cada rerun numa thread nova:
+# conexão por thread seria aberta (schema, pragmas, cache frio) e abandonada a cada clique
+POOL_SIZE = int(os.getenv("NEWS_INTEL_DB_POOL", "8"))
+_pools = {}
+_pools_lock = threading.Lock()
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+def init_db(conn=None):
+    """Cria as tabelas e índices se não existirem."""
+    own = conn is None
+    if own: conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
-    
+
     # Tabela de Relatórios (A Análise da IA)
     c.execute('''
         CREATE TABLE IF NOT EXISTS reports (
@@ -19,7 +52,7 @@ def init_db():
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
-    
+
     # Tabela de Artigos (As Fontes usadas naquele relatório)
     # Usamos chave estrangeira para ligar ao relatório
     c.execute('''
@@ -33,65 +66,559 @@ def init_db():
             FOREIGN KEY(report_id) REFERENCES reports(id)
         )
     ''')
-    
+
+    # Bancos antigos: a coluna que aponta para o corpo completo veio depois
+    if "body_hash" not in {row[1] for row in c.execute("PRAGMA table_info(articles)")}:
+        c.execute("ALTER TABLE articles ADD COLUMN body_hash TEXT")
+
+    # Corpo completo dos artigos, comprimido e endereçado pelo sha256 do texto (ver body_store.py)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS article_bodies (
+            hash TEXT PRIMARY KEY,
+            codec TEXT,
+            dict_id INTEGER,
+            raw_size INTEGER,
+            body BLOB,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Dicionários zstd treinados em notícias (o mais novo é usado nas gravações)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS body_dicts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data BLOB,
+            samples INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_report ON articles(report_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_body ON articles(body_hash)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reports_created ON reports(created_at)")
+
+    # Cache de dossiês: história + impressão digital do conjunto de fontes -> relatório
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS report_cache (
+            story_url TEXT,
+            sources_hash TEXT,
+            source_keys TEXT,
+            report_id INTEGER,
+            model TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (story_url, sources_hash),
+            FOREIGN KEY(report_id) REFERENCES reports(id)
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_report_cache_story ON report_cache(story_url, created_at)")
+
+    # Snapshots de manchetes por tópico (e do menu, com topic_url = MENU_KEY)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS headline_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic_url TEXT,
+            topic_name TEXT,
+            items TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_topic ON headline_snapshots(topic_url, id)")
+
+    # Estado de cada história vista: quando apareceu e com qual conjunto de links foi processada
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS story_state (
+            story_url TEXT PRIMARY KEY,
+            topic_url TEXT,
+            title TEXT,
+            links_hash TEXT,
+            first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_dived_at DATETIME
+        )
+    ''')
+
+    # Redirecionamentos do Google News já resolvidos: id do link -> URL do publisher
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS resolved_urls (
+            gn_id TEXT PRIMARY KEY,
+            canonical_url TEXT,
+            domain TEXT,
+            resolved_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Índices de busca textual (FTS5 "external content": o texto mora nas tabelas de cima)
+    had_fts = c.execute("SELECT 1 FROM sqlite_master WHERE name = 'reports_fts'").fetchone()
+    c.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+            topic_name, summary_text,
+            content='reports', content_rowid='id', tokenize='{FTS_TOKENIZER}'
+        )
+    ''')
+    c.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title, content_snippet, source_domain,
+            content='articles', content_rowid='id', tokenize='{FTS_TOKENIZER}'
+        )
+    ''')
+
     conn.commit()
-    conn.close()
+    if not had_fts: rebuild_search_index(conn)
+    if own: conn.close()
+
+def ensure_schema():
+    """Cria/migra o schema uma vez por processo (por arquivo de banco)."""
+    with _schema_lock:
+        if DB_NAME not in _schema_ready:
+            init_db()
+            _schema_ready.add(DB_NAME)
 
+def _connect():
+    ensure_schema()
+    # isolation_level=None: nós controlamos as transações (BEGIN IMMEDIATE em transaction())
+    # check_same_thread=False: a conexão volta pro pool e é emprestada a outra thread (nunca a duas ao mesmo tempo)
+    conn = sqlite3.connect(DB_NAME, timeout=5, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row # Para acessar colunas pelo nome
+    for pragma in PRAGMAS: conn.execute(pragma)
+    return conn
+
+@contextmanager
+def connection():
+    """Empresta uma conexão do pool do processo (já com WAL e pragmas) e devolve no fim."""
+    with _pools_lock:
+        pool = _pools.get(DB_NAME)
+        if pool is None: pool = _pools[DB_NAME] = queue.LifoQueue(POOL_SIZE)
+    try: conn = pool.get_nowait()
+    except queue.Empty: conn = _connect()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction: conn.execute("ROLLBACK")
+        try: pool.put_nowait(conn)
+        except queue.Full: conn.close()  # pico de threads passou: não guarda mais que POOL_SIZE
+
+def close_conn():
+    """Fecha as conexões ociosas do pool (ex.: fim de um teste ou benchmark)."""
+    with _pools_lock: pools = list(_pools.values())
+    for pool in pools:
+        while True:
+            try: pool.get_nowait().close()
+            except queue.Empty: break
+
+@contextmanager
+def transaction():
+    """Transação de escrita: pega o lock de escrita já no BEGIN para não dar deadlock no upgrade."""
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn.cursor()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+# --- CORPOS DOS ARTIGOS ---
+_dicts = {}  # (banco, id) -> bytes do dicionário
+
+def _body_dict(conn, dict_id):
+    if dict_id is None: return None
+    key = (DB_NAME, dict_id)
+    if key not in _dicts:
+        row = conn.execute("SELECT data FROM body_dicts WHERE id = ?", (dict_id,)).fetchone()
+        _dicts[key] = row[0] if row else None
+    return _dicts[key]
+
+def _latest_dict_id(conn):
+    if body_store.zstd is None: return None
+    row = conn.execute("SELECT MAX(id) FROM body_dicts").fetchone()
+    return row[0] if row else None
+
+def _pack_bodies(articles):
+    """Comprime (fora da transação) só os corpos que o banco ainda não tem.
+
+    Devolve ([hash por artigo], [linhas novas de article_bodies]).
+    """
+    hashes = [body_store.content_hash(str(a['content'])) if a.get('content') else None for a in articles]
+    wanted = list({h for h in hashes if h})
+    have = set()
+    with connection() as conn:
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i:i + 500]
+            have.update(r[0] for r in conn.execute(
+                f"SELECT hash FROM article_bodies WHERE hash IN ({','.join('?' * len(chunk))})", chunk))
+        dict_id = _latest_dict_id(conn)
+        dict_data = _body_dict(conn, dict_id)
+    rows, seen = [], set(have)
+    for a, h in zip(articles, hashes):
+        if not h or h in seen: continue
+        seen.add(h)
+        text = str(a['content'])
+        codec, blob = body_store.compress(text, dict_id, dict_data)
+        rows.append((h, codec, dict_id if codec == "zstd-dict" else None, len(text.encode("utf-8")), blob))
+    return hashes, rows
+
+@metrics.timed("db")
 def save_full_report(topic_url, topic_name, summary_text, articles):
     """Salva o relatório e todas as suas fontes de uma vez (Transação Atômica)."""
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
     try:
-        # 1. Inserir Relatório
-        c.execute("INSERT INTO reports (topic_url, topic_name, summary_text) VALUES (?, ?, ?)",
-                  (topic_url, topic_name, summary_text))
-        report_id = c.lastrowid
-        
-        # 2. Inserir Artigos vinculados
-        for art in articles:
-            # Pegamos só um pedaço do conteúdo para preview, para não pesar o banco
-            snippet = str(art['content'])[:300] if art.get('content') else ""
+        body_hashes, body_rows = _pack_bodies(articles)
+        with transaction() as c:
+            # 1. Inserir Relatório
+            c.execute("INSERT INTO reports (topic_url, topic_name, summary_text) VALUES (?, ?, ?)",
+                      (topic_url, topic_name, summary_text))
+            report_id = c.lastrowid
+
+            # 2. Corpos completos (só os novos; matéria repetida entre dossiês é gravada uma vez)
+            c.executemany("""
+                INSERT OR IGNORE INTO article_bodies (hash, codec, dict_id, raw_size, body) VALUES (?, ?, ?, ?, ?)
+            """, body_rows)
+
+            # 3. Inserir Artigos vinculados (um executemany só)
+            # O snippet fica para preview/busca; o texto inteiro é referenciado por body_hash
+            rows = [(report_id, art['title'], art['source_domain'], art['url'],
+                     str(art['content'])[:300] if art.get('content') else "", h)
+                    for art, h in zip(articles, body_hashes)]
+            c.executemany("""
+                INSERT INTO articles (report_id, title, source_domain, url, content_snippet, body_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+
+            # 4. Índice de busca, incremental (só as linhas novas)
+            c.execute("INSERT INTO reports_fts (rowid, topic_name, summary_text) VALUES (?, ?, ?)",
+                      (report_id, topic_name, summary_text))
             c.execute("""
-                INSERT INTO articles (report_id, title, source_domain, url, content_snippet)
-                VALUES (?, ?, ?, ?, ?)
-            """, (report_id, art['title'], art['source_domain'], art['url'], snippet))
-        
-        conn.commit()
+                INSERT INTO articles_fts (rowid, title, content_snippet, source_domain)
+                SELECT id, title, content_snippet, source_domain FROM articles WHERE report_id = ?
+            """, (report_id,))
         return report_id
     except Exception as e:
-        conn.rollback()
         print(f"Erro ao salvar no banco: {e}")
         raise e
-    finally:
-        conn.close()
 
+@metrics.timed("db")
+def get_reports_page(limit=50, before_id=None):
+    """Uma página do histórico (mais novos primeiro). Passe o último id recebido em `before_id`."""
+    with connection() as conn:
+        c = conn.cursor()
+        if before_id is None:
+            c.execute("SELECT id, topic_name, created_at FROM reports ORDER BY id DESC LIMIT ?", (limit,))
+        else:
+            c.execute("SELECT id, topic_name, created_at FROM reports WHERE id < ? ORDER BY id DESC LIMIT ?",
+                      (before_id, limit))
+        return [dict(row) for row in c.fetchall()]
+
+def iter_reports(page_size=200):
+    """Percorre o histórico inteiro página a página, sem carregar tudo na memória."""
+    before_id = None
+    while True:
+        page = get_reports_page(page_size, before_id)
+        yield from page
+        if len(page) < page_size: return
+        before_id = page[-1]['id']
+
+@metrics.timed("db")
+def count_reports():
+    with connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+@metrics.timed("db")
 def get_all_reports():
     """Busca o histórico para o menu lateral."""
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row # Para acessar colunas pelo nome
-    c = conn.cursor()
-    c.execute("SELECT id, topic_name, created_at FROM reports ORDER BY id DESC")
-    rows = c.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    return list(iter_reports())
 
+@metrics.timed("db")
 def get_report_details(report_id):
     """Recupera um relatório completo e suas fontes."""
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    
-    # Pega o relatório
-    c.execute("SELECT * FROM reports WHERE id = ?", (report_id,))
-    report = dict(c.fetchone())
-    
-    # Pega os artigos
-    c.execute("SELECT * FROM articles WHERE report_id = ?", (report_id,))
-    articles = [dict(row) for row in c.fetchall()]
-    
-    conn.close()
-    return report, articles
-
-# Inicializa o banco assim que o arquivo é importado
-init_db()
\ No newline at end of file
+    with connection() as conn:
+        c = conn.cursor()
+
+        # Pega o relatório
+        c.execute("SELECT * FROM reports WHERE id = ?", (report_id,))
+        row = c.fetchone()
+        if row is None: return None, []
+        report = dict(row)
+
+        # Pega os artigos
+        c.execute("SELECT * FROM articles WHERE report_id = ?", (report_id,))
+        articles = [dict(row) for row in c.fetchall()]
+
+        return report, articles
+
+# --- LEITURA DOS CORPOS ---
+@metrics.timed("db")
+def get_article_body(body_hash):
+    """Texto completo de um artigo (ou None se o corpo não estiver no banco)."""
+    with connection() as conn:
+        row = conn.execute("SELECT codec, dict_id, body FROM article_bodies WHERE hash = ?", (body_hash,)).fetchone()
+        if row is None: return None
+        return body_store.decompress(row['codec'], row['body'], row['dict_id'], _body_dict(conn, row['dict_id']))
+
+def iter_article_body(body_hash, chunk_size=64 * 1024):
+    """Gera o texto do artigo em pedaços: lê o BLOB aos poucos e descomprime em fluxo."""
+    with connection() as conn:
+        row = conn.execute("SELECT rowid, codec, dict_id FROM article_bodies WHERE hash = ?", (body_hash,)).fetchone()
+        if row is None: return
+        dec = body_store.decompressobj(row['codec'], row['dict_id'], _body_dict(conn, row['dict_id']))
+        text = codecs.getincrementaldecoder("utf-8")()
+        with conn.blobopen("article_bodies", "body", row['rowid'], readonly=True) as blob:
+            while chunk := blob.read(chunk_size):
+                out = text.decode(dec.decompress(chunk))
+                if out: yield out
+        tail = text.decode(dec.flush(), final=True)
+        if tail: yield tail
+
+@metrics.timed("db")
+def get_report_sources(report_id):
+    """Fontes do relatório com o texto inteiro em 'content' (cai no snippet se o corpo não existir).
+
+    Serve para regerar/reranquear um dossiê sem crawl.
+    """
+    _, articles = get_report_details(report_id)
+    for a in articles:
+        body = get_article_body(a['body_hash']) if a.get('body_hash') else None
+        a['content'] = body if body is not None else a['content_snippet']
+    return articles
+
+@metrics.timed("db")
+def train_body_dictionary(max_samples=2000, size=body_store.DICT_SIZE):
+    """Treina um dicionário zstd com os corpos mais recentes. Devolve o id (ou None)."""
+    samples = []
+    with connection() as conn:
+        for row in conn.execute("SELECT codec, dict_id, body FROM article_bodies ORDER BY rowid DESC LIMIT ?", (max_samples,)):
+            try: samples.append(body_store.decompress(row['codec'], row['body'], row['dict_id'], _body_dict(conn, row['dict_id'])))
+            except RuntimeError: continue
+    data = body_store.train_dictionary(samples, size)
+    if data is None: return None
+    with transaction() as c:
+        c.execute("INSERT INTO body_dicts (data, samples) VALUES (?, ?)", (data, len(samples)))
+        return c.lastrowid
+
+@metrics.timed("db")
+def body_store_stats():
+    with connection() as conn:
+        n, raw, stored = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM article_bodies").fetchone()
+        refs = conn.execute("SELECT COUNT(*) FROM articles WHERE body_hash IS NOT NULL").fetchone()[0]
+        codecs_ = dict(conn.execute("SELECT codec, COUNT(*) FROM article_bodies GROUP BY codec").fetchall())
+        return {"bodies": n, "references": refs, "raw_bytes": raw, "stored_bytes": stored, "codecs": codecs_}
+
+# --- CACHE DE DOSSIÊS ---
+@metrics.timed("db")
+def save_report_cache(story_url, sources_hash, source_keys, report_id, model):
+    with transaction() as c:
+        c.execute("""
+            INSERT OR REPLACE INTO report_cache (story_url, sources_hash, source_keys, report_id, model)
+            VALUES (?, ?, ?, ?, ?)
+        """, (story_url, sources_hash, json.dumps(source_keys), report_id, model))
+
+def _cached_row(row):
+    if row is None: return None
+    out = dict(row)
+    out['source_keys'] = json.loads(out['source_keys'] or "[]")
+    return out
+
+@metrics.timed("db")
+def get_cached_report(story_url, sources_hash):
+    """Dossiê já gerado para exatamente este conjunto de fontes, ou None."""
+    with connection() as conn:
+        row = conn.execute("""
+            SELECT rc.*, r.summary_text FROM report_cache rc JOIN reports r ON r.id = rc.report_id
+            WHERE rc.story_url = ? AND rc.sources_hash = ?
+        """, (story_url, sources_hash)).fetchone()
+        return _cached_row(row)
+
+def _age_clause(max_age, column="created_at"):
+    """Filtro SQL de idade máxima (segundos); created_at é gravado em UTC pelo SQLite."""
+    if max_age is None: return "", ()
+    return f" AND {column} >= datetime('now', ?)", (f"-{int(max_age)} seconds",)
+
+@metrics.timed("db")
+def get_latest_cached_report(story_url, max_age=None):
+    """Dossiê mais recente da história, qualquer que seja o conjunto de fontes."""
+    age_sql, age_args = _age_clause(max_age, "rc.created_at")
+    with connection() as conn:
+        row = conn.execute(f"""
+            SELECT rc.*, r.summary_text FROM report_cache rc JOIN reports r ON r.id = rc.report_id
+            WHERE rc.story_url = ?{age_sql} ORDER BY rc.created_at DESC, rc.rowid DESC LIMIT 1
+        """, (story_url, *age_args)).fetchone()
+        return _cached_row(row)
+
+# --- SNAPSHOTS (MENU E MANCHETES) ---
+@metrics.timed("db")
+def save_headline_snapshot(topic_url, topic_name, items):
+    with transaction() as c:
+        c.execute("INSERT INTO headline_snapshots (topic_url, topic_name, items) VALUES (?, ?, ?)",
+                  (topic_url, topic_name, json.dumps(items, ensure_ascii=False)))
+        return c.lastrowid
+
+@metrics.timed("db")
+def get_latest_headlines(topic_url, max_age=None):
+    """Manchetes do último snapshot do tópico (ou None se não houver um recente o bastante)."""
+    age_sql, age_args = _age_clause(max_age)
+    with connection() as conn:
+        row = conn.execute(f"""
+            SELECT items FROM headline_snapshots WHERE topic_url = ?{age_sql} ORDER BY id DESC LIMIT 1
+        """, (topic_url, *age_args)).fetchone()
+        return json.loads(row['items']) if row else None
+
+@metrics.timed("db")
+def save_menu_snapshot(menu):
+    return save_headline_snapshot(MENU_KEY, "menu", menu)
+
+@metrics.timed("db")
+def get_latest_menu(max_age=None):
+    return get_latest_headlines(MENU_KEY, max_age)
+
+# --- ESTADO DAS HISTÓRIAS ---
+@metrics.timed("db")
+def touch_stories(topic_url, items):
+    """Registra/atualiza as histórias vistas num refresh (título atual + last_seen)."""
+    with transaction() as c:
+        c.executemany("""
+            INSERT INTO story_state (story_url, topic_url, title) VALUES (?, ?, ?)
+            ON CONFLICT(story_url) DO UPDATE SET title = excluded.title, last_seen = CURRENT_TIMESTAMP
+        """, [(it['url'], topic_url, it['title']) for it in items])
+
+@metrics.timed("db")
+def get_story_states(story_urls):
+    """Estado de várias histórias de uma vez: {url: {...}}."""
+    urls = list(story_urls)
+    out = {}
+    with connection() as conn:
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT * FROM story_state WHERE story_url IN ({marks})", chunk):
+                out[row['story_url']] = dict(row)
+        return out
+
+@metrics.timed("db")
+def mark_story_dived(story_url, links_hash):
+    with transaction() as c:
+        c.execute("""
+            INSERT INTO story_state (story_url, links_hash, last_dived_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(story_url) DO UPDATE SET links_hash = excluded.links_hash, last_dived_at = CURRENT_TIMESTAMP
+        """, (story_url, links_hash))
+
+# --- REDIRECIONAMENTOS RESOLVIDOS ---
+@metrics.timed("db")
+def save_resolved_urls(rows):
+    """Grava vários (gn_id, canonical_url, domain) de uma vez."""
+    if not rows: return
+    with transaction() as c:
+        c.executemany("""
+            INSERT INTO resolved_urls (gn_id, canonical_url, domain) VALUES (?, ?, ?)
+            ON CONFLICT(gn_id) DO UPDATE SET canonical_url = excluded.canonical_url,
+                domain = excluded.domain, resolved_at = CURRENT_TIMESTAMP
+        """, rows)
+
+@metrics.timed("db")
+def get_resolved_urls(gn_ids):
+    """Busca em lote: {gn_id: {"canonical_url": ..., "domain": ...}} só para os já conhecidos."""
+    ids = [i for i in set(gn_ids) if i]
+    out = {}
+    with connection() as conn:
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT gn_id, canonical_url, domain FROM resolved_urls WHERE gn_id IN ({marks})", chunk):
+                out[row['gn_id']] = {"canonical_url": row['canonical_url'], "domain": row['domain']}
+        return out
+
+@metrics.timed("db")
+def prune_snapshots(keep_per_topic=48):
+    """Apaga snapshots antigos, mantendo os `keep_per_topic` mais recentes de cada tópico."""
+    with transaction() as c:
+        c.execute("""
+            DELETE FROM headline_snapshots WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY topic_url ORDER BY id DESC) AS rn
+                    FROM headline_snapshots
+                ) WHERE rn > ?
+            )
+        """, (keep_per_topic,))
+        return c.rowcount
+
+# --- BUSCA (FTS5) ---
+@metrics.timed("db")
+def rebuild_search_index(conn=None):
+    """Reconstrói os índices FTS a partir das tabelas (ex.: banco antigo, anterior à busca)."""
+    if conn is None:
+        with connection() as conn: return rebuild_search_index(conn)
+    conn.execute("INSERT INTO reports_fts (reports_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+    conn.commit()
+
+def _fts_query(text):
+    """Texto livre -> consulta FTS5 segura: termos entre aspas (AND implícito), prefixo no último."""
+    terms = re.findall(r"\w+", text or "")
+    if not terms: return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+# Candidatos por índice FTS = (limit + offset) * SEARCH_FANOUT: um relatório tem várias fontes
+# no articles_fts, então os k melhores trechos podem cobrir menos de k relatórios
+SEARCH_FANOUT = 8
+
+@metrics.timed("db")
+def search_reports(query, limit=20, offset=0, date_from=None, date_to=None, domain=None):
+    """Busca relatórios por resumo ou pelas fontes (título, trecho, domínio), ordenados por bm25.
+
+    `date_from`/`date_to` são datas 'AAAA-MM-DD' (inclusivas); `domain` filtra relatórios
+    com ao menos uma fonte daquele domínio. O `snippet` vem com os termos em **negrito**.
+    Cada índice devolve só os melhores candidatos (filtros aplicados lá dentro) e o
+    `snippet()` só é calculado para a página final.
+    """
+    q = _fts_query(query)
+    if q is None: return []
+    params = {"q": q, "date_from": date_from, "date_to": date_to, "domain": domain,
+              "k": (limit + offset) * SEARCH_FANOUT, "limit": limit, "offset": offset}
+    # Sem filtro, o top-k sai direto do índice; com filtro, o JOIN com reports vai para dentro
+    # do subselect para o LIMIT não cortar candidatos que passariam no filtro
+    filters = "" if date_from is None and date_to is None and domain is None else """
+          AND (:date_from IS NULL OR r.created_at >= :date_from)
+          AND (:date_to IS NULL OR r.created_at < date(:date_to, '+1 day'))
+          AND (:domain IS NULL OR EXISTS (
+                SELECT 1 FROM articles d WHERE d.report_id = r.id
+                AND (d.source_domain = :domain OR d.source_domain LIKE '%.' || :domain)))"""
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute(f"""
+            WITH hits AS (
+                SELECT * FROM (
+                    SELECT reports_fts.rowid AS report_id, reports_fts.rowid AS hit, 'r' AS src,
+                           bm25(reports_fts, 2.0, 1.0) AS score
+                    FROM reports_fts {"JOIN reports r ON r.id = reports_fts.rowid" if filters else ""}
+                    WHERE reports_fts MATCH :q {filters}
+                    ORDER BY score LIMIT :k)
+                UNION ALL
+                SELECT a.report_id, t.hit, 'a', t.score FROM (
+                    SELECT articles_fts.rowid AS hit, bm25(articles_fts, 3.0, 1.0, 0.5) AS score
+                    FROM articles_fts {"JOIN articles a ON a.id = articles_fts.rowid JOIN reports r ON r.id = a.report_id" if filters else ""}
+                    WHERE articles_fts MATCH :q {filters}
+                    ORDER BY score LIMIT :k) t
+                JOIN articles a ON a.id = t.hit
+            )
+            -- MIN() num GROUP BY: hit/src vêm da linha de melhor score de cada relatório
+            SELECT r.id, r.topic_name, r.topic_url, r.created_at, MIN(h.score) AS score, h.hit, h.src
+            FROM hits h JOIN reports r ON r.id = h.report_id
+            GROUP BY r.id
+            ORDER BY score
+            LIMIT :limit OFFSET :offset
+        """, params)
+        rows = [dict(row) for row in c.fetchall()]
+
+        # Trechos só dos vencedores da página
+        snips = {}
+        for src, table in (("r", "reports_fts"), ("a", "articles_fts")):
+            ids = [row["hit"] for row in rows if row["src"] == src]
+            if not ids: continue
+            c.execute(f"""
+                SELECT rowid, snippet({table}, -1, '**', '**', '…', 16) FROM {table}
+                WHERE {table} MATCH ? AND rowid IN ({",".join("?" * len(ids))})
+            """, [q, *ids])
+            snips.update({(src, rowid): snip for rowid, snip in c.fetchall()})
+    for row in rows:
+        row["snippet"] = snips.get((row.pop("src"), row.pop("hit")), "")
+    return rows
@@ -0,0 +1,76 @@
+"""Detecção de quase-duplicatas entre as fontes de uma história (MinHash sobre shingles).
+
+Notícia de agência (Agência Brasil, Reuters, Estadão Conteúdo...) aparece igual em vários
+domínios; mandar o mesmo texto N vezes pro modelo só gasta token.
+"""
+import random
+import re
+import zlib
+
+NUM_PERM = 64
+SHINGLE = 5
+THRESHOLD = 0.7
+_PRIME = (1 << 61) - 1
+_rnd = random.Random(1337)
+_PERMS = [(_rnd.randrange(1, _PRIME), _rnd.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD = re.compile(r"\w+")
+
+
+def _shingles(text):
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE: return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+
+
+def minhash(text):
+    """Assinatura MinHash (NUM_PERM inteiros) do texto."""
+    hashes = [zlib.crc32(s.encode()) for s in _shingles(text)]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+def similarity(sig_a, sig_b):
+    """Estimativa da similaridade de Jaccard entre dois textos a partir das assinaturas."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def dedup_articles(articles, threshold=THRESHOLD):
+    """Agrupa corpos quase idênticos e mantém uma cópia canônica por grupo (a mais longa).
+
+    A cópia canônica ganha `also_published_by` com os domínios das outras cópias.
+    A ordem das fontes que sobram segue a ordem original.
+    """
+    if len(articles) < 2: return articles
+    sigs = [minhash(a['content']) for a in articles]
+
+    # Union-find simples: n é pequeno (<= ~10 fontes), comparação par a par basta
+    parent = list(range(len(articles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(articles)):
+        for j in range(i + 1, len(articles)):
+            if similarity(sigs[i], sigs[j]) >= threshold:
+                parent[find(j)] = find(i)
+
+    groups = {}
+    for i in range(len(articles)): groups.setdefault(find(i), []).append(i)
+
+    kept = []
+    for members in groups.values():
+        canon = max(members, key=lambda i: len(articles[i]['content']))
+        art = dict(articles[canon])
+        others = []
+        for i in members:
+            dom = articles[i]['source_domain']
+            if i != canon and dom != art['source_domain'] and dom not in others: others.append(dom)
+        art['also_published_by'] = others
+        kept.append((min(members), art))
+
+    kept.sort(key=lambda x: x[0])
+    if len(kept) < len(articles):
+        print(f"   🧬 Dedup: {len(articles)} fontes -> {len(kept)} textos distintos")
+    return [art for _, art in kept]
@@ -0,0 +1,176 @@
+import hashlib
+import re
+import time
+from functools import lru_cache
+import database as db
+import metrics
+from prompt_packer import budget_for, estimate_tokens, pack_sources
+
+MODEL = 'gemini-2.5-flash-lite'
+ERROR_TEXT = "Erro na geração."
+# Acima dessa fração de fontes novas, vale mais gerar do zero do que remendar
+MAX_DELTA_RATIO = 0.5
+
+
+# --- IMPRESSÃO DIGITAL DAS FONTES ---
+def source_key(article):
+    """Hash do corpo normalizado (espaços colapsados): mesma matéria = mesma chave."""
+    body = re.sub(r"\s+", " ", str(article.get('content') or "")).strip().lower()
+    return hashlib.sha1(body.encode()).hexdigest()
+
+
+def sources_fingerprint(articles):
+    keys = sorted({source_key(a) for a in articles})
+    return hashlib.sha256("\n".join(keys).encode()).hexdigest(), keys
+
+
+# --- PROMPTS ---
+def _source_block(a, body):
+    also = a.get('also_published_by')
+    head = f"## {a['source_domain']}" + (f" (também publicado por: {', '.join(also)})" if also else "")
+    return f"{head}\n{a['title']}\n{body}\n"
+
+
+def _sources_text(articles, budget):
+    # Orçamento de tokens dividido entre as fontes, parágrafos mais salientes primeiro
+    bodies = pack_sources(articles, budget)
+    return "".join([_source_block(a, body) for a, body in zip(articles, bodies)])
+
+
+def build_prompt(articles, budget=None):
+    txt = _sources_text(articles, budget or budget_for(MODEL))
+    return f"Analista de Inteligência.\nGere dossiê executivo:\n\n{txt}"
+
+
+def build_update_prompt(prior_report, new_articles, budget=None):
+    # O dossiê anterior vai inteiro; as fontes novas ficam com o que sobrar do orçamento
+    budget = max(1000, (budget or budget_for(MODEL)) - estimate_tokens(prior_report))
+    txt = _sources_text(new_articles, budget)
+    return (
+        "Analista de Inteligência.\n"
+        "Abaixo está o dossiê executivo já publicado e as fontes NOVAS que chegaram depois.\n"
+        "Reescreva o dossiê completo incorporando apenas o que as fontes novas acrescentam "
+        "ou corrigem; mantenha a estrutura e o que continua válido.\n\n"
+        f"# DOSSIÊ ATUAL\n{prior_report}\n\n# FONTES NOVAS\n{txt}"
+    )
+
+
+@lru_cache(maxsize=4)
+def _client(api_key):
+    # google-genai só é importado na primeira geração (não no startup do dashboard)
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+
+def _call_model(prompt, api_key, mode="full"):
+    with metrics.span("generate", model=MODEL, mode=mode) as sp:
+        sp.bytes = len(prompt)
+        return _client(api_key).models.generate_content(model=MODEL, contents=prompt).text
+
+
+# --- CACHE PERSISTENTE + MODO INCREMENTAL ---
+def _plan(story_url, articles):
+    """Decide como obter o dossiê: (texto_pronto, modo, prompt, fingerprint, chaves)."""
+    fp, keys = sources_fingerprint(articles)
+
+    hit = db.get_cached_report(story_url, fp)
+    if hit: return hit['summary_text'], "cache", None, fp, keys
+
+    prior = db.get_latest_cached_report(story_url)
+    if prior:
+        known = set(prior['source_keys'])
+        delta = [a for a in articles if source_key(a) not in known]
+        if not delta:
+            # Só saíram fontes: o dossiê anterior já cobre tudo que sobrou
+            return prior['summary_text'], "cache", None, fp, keys
+        if len(delta) <= max(1, MAX_DELTA_RATIO * len(articles)):
+            print(f"   🧩 Dossiê incremental: {len(delta)} fonte(s) nova(s)")
+            return None, "incremental", build_update_prompt(prior['summary_text'], delta), fp, keys
+    return None, "full", build_prompt(articles), fp, keys
+
+
+def _save(story_url, title, text, articles, fp, keys):
+    try:
+        report_id = db.save_full_report(story_url, title, text, articles)
+        db.save_report_cache(story_url, fp, keys, report_id, MODEL)
+    except Exception as e:
+        print(f"⚠️ Erro ao salvar no DB (mas vou mostrar o relatório): {e}")
+
+
+def get_or_build_report(story_url, title, articles, api_key):
+    """Devolve (texto, modo) reaproveitando dossiês salvos no banco.
+
+    modo: "cache" (mesmo conjunto de fontes), "incremental" (dossiê anterior + só as
+    fontes novas), "full" (geração do zero) ou "error". Só resultados bons são salvos.
+    """
+    if not articles: return None, "error"
+    text, mode, prompt, fp, keys = _plan(story_url, articles)
+    metrics.count("dossier_total", mode=mode)
+    if text is not None: return text, mode
+
+    try:
+        text = _call_model(prompt, api_key, mode)
+    except Exception as e:
+        print(f"   ⚠️ Erro na geração: {e}")
+        return ERROR_TEXT, "error"
+    if not text: return ERROR_TEXT, "error"
+
+    _save(story_url, title, text, articles, fp, keys)
+    return text, mode
+
+
+def stream_report(story_url, title, articles, api_key, save=True):
+    """Versão em streaming: devolve (modo, gerador de pedaços de texto).
+
+    O dossiê só é salvo quando o stream termina inteiro e sem erro. Com `save=False`
+    nada é gravado: quem chama fecha o dossiê com `finish_report` (fontes atrasadas).
+    """
+    text, mode, prompt, fp, keys = _plan(story_url, articles)
+    metrics.count("dossier_total", mode=mode)
+    if text is not None: return mode, iter([text])
+
+    def chunks():
+        parts = []
+        try:
+            with metrics.span("generate", model=MODEL, mode=mode) as sp:
+                sp.bytes = len(prompt)
+                for chunk in _client(api_key).models.generate_content_stream(model=MODEL, contents=prompt):
+                    if chunk.text:
+                        if not parts: metrics.observe("generate_first_chunk_seconds", time.time() - sp.started, model=MODEL)
+                        parts.append(chunk.text)
+                        yield chunk.text
+        except Exception as e:
+            print(f"   ⚠️ Erro na geração: {e}")
+            yield f"\n\n{ERROR_TEXT}"
+            return
+        if parts and save: _save(story_url, title, "".join(parts), articles, fp, keys)
+
+    return mode, chunks()
+
+
+def finish_report(story_url, title, text, used, articles, api_key, saved=False):
+    """Fecha um dossiê de `stream_report(save=False)` com o conjunto final de fontes.
+
+    `text` foi gerado com `used` (o quórum); o que chegou depois entra pelo caminho
+    incremental e só o resultado final é salvo: um relatório por história aberta.
+    `saved=True` quando `text` já veio do banco (modo "cache").
+    Devolve (texto, modo): "unchanged", "incremental" ou "error" (fica o texto do quórum).
+    """
+    known = {source_key(a) for a in used}
+    delta = [a for a in articles if source_key(a) not in known]
+    if not delta:
+        if not saved: _save(story_url, title, text, used, *sources_fingerprint(used))
+        return text, "unchanged"
+
+    print(f"   🧩 Completando o dossiê: {len(delta)} fonte(s) atrasada(s)")
+    metrics.count("dossier_total", mode="incremental")
+    try:
+        updated = _call_model(build_update_prompt(text, delta), api_key, "incremental")
+    except Exception as e:
+        print(f"   ⚠️ Erro na geração: {e}")
+        updated = None
+    if not updated:
+        if not saved: _save(story_url, title, text, used, *sources_fingerprint(used))
+        return text, "error"
+    _save(story_url, title, updated, articles, *sources_fingerprint(articles))
+    return updated, "incremental"
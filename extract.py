@@ -0,0 +1,188 @@
+"""Extração de links/títulos/imagens das páginas do Google News.
+
+Tudo em lxml numa passada só. A lógica original em BeautifulSoup ficou como
+referência no teste de paridade (tests/test_extract_parity.py).
+"""
+import re
+from urllib.parse import urlsplit
+
+import lxml.html
+
+MENU_PRIORITY = ["Brasil", "Mundo", "Local", "Negócios", "Tecnologia", "Entretenimento", "Esportes", "Saúde"]
+MEDIA_TAGS = ("img", "h3", "h4")
+SKIP_TEXT = {"script", "style", "template"}
+_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+_GN_ID = re.compile(r"/(articles|read|stories)/([^/?#]+)")
+
+
+def _parse(html):
+    if not html: return None
+    try:
+        return lxml.html.document_fromstring(html.encode("utf-8", "replace"), parser=_PARSER)
+    except Exception:
+        return None
+
+
+def _text(el):
+    """Equivalente ao get_text(strip=True) do BeautifulSoup (ignora script/style e comentários)."""
+    parts = []
+    stack = [el]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            s = node.strip()
+            if s: parts.append(s)
+            continue
+        # Empilha ao contrário para desempilhar na ordem do documento
+        for child in reversed(node):
+            if child.tail: stack.append(child.tail)
+            if isinstance(child.tag, str) and child.tag not in SKIP_TEXT: stack.append(child)
+        if isinstance(node.tag, str) and node.tag not in SKIP_TEXT and node.text: stack.append(node.text)
+    return "".join(parts)
+
+
+def clean_image_url(url):
+    if not url: return None
+    if "googleusercontent.com" in url: return url
+    if url.startswith("data:image"): return url
+    if "/api/attachments/" in url: return None
+    if "favicon" in url: return None
+    if not url.startswith("http"): return None
+    return url
+
+
+def _first_image(img, clean_image):
+    raw = img.get('src') or img.get('data-src') or img.get('srcset', '').split(' ')[0]
+    return clean_image(raw)
+
+
+def _full(href, base_url):
+    return href.replace(".", base_url, 1)
+
+
+# --- MANCHETES ---
+def extract_headlines(html, base_url, clean_image):
+    """Cards de manchete em uma passada: [{title, url, image, is_cluster}]."""
+    root = _parse(html)
+    if root is None: return []
+
+    # Marca de uma vez todo ancestral que contém img/h3/h4 (custo linear no total)
+    has_media = set()
+    for el in root.iter(*MEDIA_TAGS):
+        p = el.getparent()
+        while p is not None and p not in has_media:
+            has_media.add(p)
+            p = p.getparent()
+
+    cards = {}  # memo: bloco -> (título do h3/h4, maior texto de link, imagem)
+
+    def card_info(block):
+        info = cards.get(block)
+        if info is None:
+            h = next(block.iterdescendants('h3', 'h4'), None)
+            link_texts = [_text(l) for l in block.iterdescendants('a')]
+            img = next(block.iterdescendants('img'), None)
+            info = (
+                _text(h) if h is not None else None,
+                max(link_texts, key=len) if link_texts else None,
+                _first_image(img, clean_image) if img is not None else None,
+            )
+            cards[block] = info
+        return info
+
+    headlines = []
+    seen = set()
+    for a in root.iter('a'):
+        href = a.get('href')
+        if href is None: continue
+        is_story = "./stories/" in href
+        is_article = "./articles/" in href
+        if not (is_story or is_article): continue
+
+        full_link = _full(href, base_url)
+        if full_link in seen: continue
+
+        title = _text(a)
+
+        # Sobe até 4 níveis procurando o container com imagem/h3/h4.
+        # No BeautifulSoup o pai do <html> é o próprio documento: emulamos esse nível extra.
+        card_block = None
+        parent = a.getparent()
+        at_document = False
+        for _ in range(4):
+            if parent is None: break
+            if parent in has_media:
+                card_block = parent
+                break
+            if at_document: break
+            up = parent.getparent()
+            if up is None: up, at_document = parent, True
+            parent = up
+
+        img_src = None
+        if card_block is not None:
+            heading, longest_link, img_src = card_info(card_block)
+            if heading is not None:
+                title = heading
+            elif len(title) < 10 and longest_link is not None:
+                title = longest_link
+
+        if len(title) < 10: continue
+
+        headlines.append({
+            "title": title,
+            "url": full_link,
+            "image": img_src,
+            "is_cluster": is_story
+        })
+        seen.add(full_link)
+
+    return headlines
+
+
+# --- MENU ---
+def _menu_rank(title):
+    return next((i for i, p in enumerate(MENU_PRIORITY) if p.lower() in title.lower()), 99)
+
+
+def extract_menu_topics(html, base_url):
+    root = _parse(html)
+    if root is None: return []
+    topics = []
+    seen = set()
+    for a in root.iter('a'):
+        href = a.get('href')
+        if href is None or "./topics/" not in href: continue
+        txt = _text(a)
+        if 2 < len(txt) < 20 and _menu_rank(txt) < 99:
+            full = _full(href, base_url)
+            if full not in seen:
+                topics.append({"title": txt, "url": full})
+                seen.add(full)
+    topics.sort(key=lambda x: _menu_rank(x['title']))
+    return topics
+
+
+# --- LINKS DE UMA HISTÓRIA ---
+def extract_story_links(html, base_url):
+    """Links de artigo (./articles/ ou /read/) na ordem do documento, sem repetição."""
+    root = _parse(html)
+    if root is None: return []
+    links = {}
+    for a in root.iter('a'):
+        href = a.get('href')
+        if href and ("./articles/" in href or "/read/" in href):
+            links[_full(href, base_url) if href.startswith(".") else href] = None
+    return list(links)
+
+
+def google_news_id(url, base_url="https://news.google.com"):
+    """ID estável de um link do Google News (./articles/<id>, /read/<id>, ./stories/<id>) ou None.
+
+    Só vale para links do host de `base_url` (ou relativos): publisher com /read/ ou
+    /stories/ no caminho não é redirect do Google.
+    """
+    host = urlsplit(url or "").netloc
+    if host and host != urlsplit(base_url).netloc: return None
+    m = _GN_ID.search(url or "")
+    return f"{m.group(1)}/{m.group(2)}" if m else None
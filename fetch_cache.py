@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import metrics
+
+# TTL por tipo de página (segundos). Artigo quase nunca muda depois de publicado.
+DEFAULT_TTLS = {
+    "menu": 6 * 3600,
+    "topic": 10 * 60,
+    "story": 15 * 60,
+    "article": 7 * 24 * 3600,
+}
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "ocid")
+
+
+def normalize_url(url):
+    """Forma canônica da URL: esquema/host minúsculos, sem fragmento, sem tracking, query ordenada."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.endswith(":80") and parts.scheme == "http": host = host[:-3]
+    if host.endswith(":443") and parts.scheme == "https": host = host[:-4]
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(TRACKING_PARAMS)]
+    return urlunsplit((parts.scheme.lower(), host, parts.path or "/", urlencode(sorted(query)), ""))
+
+
+def url_key(url):
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+
+class CacheEntry:
+    def __init__(self, data, fetched_at, ttl, etag=None, last_modified=None):
+        self.data = data
+        self.fetched_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh = time.time() - fetched_at < ttl
+
+    def validators(self):
+        """Cabeçalhos para GET condicional (revalidação)."""
+        h = {}
+        if self.etag: h["If-None-Match"] = self.etag
+        if self.last_modified: h["If-Modified-Since"] = self.last_modified
+        return h
+
+
+class FetchCache:
+    """Cache em disco de páginas baixadas (HTML/markdown comprimidos).
+
+    Chave = sha256 da URL normalizada; índice num SQLite ao lado dos blobs.
+    Cada tipo ("menu", "topic", "story", "article") tem seu TTL; entradas vencidas
+    continuam disponíveis para revalidação via ETag/Last-Modified. Acima de
+    `max_bytes` os blobs menos acessados recentemente são apagados (LRU).
+    """
+
+    def __init__(self, root="data/cache", max_bytes=256 * 1024 * 1024, ttls=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                kind TEXT,
+                size INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                accessed_at REAL
+            )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+        self._conn.commit()
+        self.hits = self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".z")
+
+    def get(self, url, kind):
+        """Devolve CacheEntry (fresca ou vencida) ou None."""
+        key = url_key(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, etag, last_modified FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                metrics.count("cache_lookups_total", kind=kind, result="miss")
+                return None
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = json.loads(zlib.decompress(f.read()))
+            except (OSError, zlib.error, ValueError):
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                metrics.count("cache_lookups_total", kind=kind, result="miss")
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        entry = CacheEntry(data, row[0], self.ttls.get(kind, 0), row[1], row[2])
+        if entry.fresh: self.hits += 1
+        else: self.misses += 1
+        metrics.count("cache_lookups_total", kind=kind, result="hit" if entry.fresh else "stale")
+        return entry
+
+    def put(self, url, kind, data, etag=None, last_modified=None):
+        key = url_key(url)
+        blob = zlib.compress(json.dumps(data, ensure_ascii=False).encode(), 6)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # pid + thread: processos do batch.py dividem o mesmo diretório de cache
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f: f.write(blob)
+        os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, kind, size, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, normalize_url(url), kind, len(blob), etag, last_modified, now, now))
+            self._conn.commit()
+            self._evict()
+
+    def touch(self, url):
+        """Revalidação 304: a cópia em disco continua valendo, renova o relógio do TTL."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, url_key(url)))
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes: return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+            if total <= self.max_bytes: break
+            victims.append(key)
+            total -= size
+        for key in victims:
+            try: os.remove(self._path(key))
+            except OSError: pass
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in victims])
+        self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            n, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": n, "bytes": size, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,41 @@
+import httpx
+
+# Cookie de consentimento evita o interstício do consent.google.com
+DEFAULT_COOKIES = {"CONSENT": "YES+cb"}
+
+
+class HttpFetcher:
+    """Cliente HTTP assíncrono (keep-alive + HTTP/2) para páginas que já vêm renderizadas.
+
+    O AsyncClient é criado preguiçosamente no primeiro uso, para ficar preso ao
+    event loop que de fato vai usá-lo (o loop do CrawlerPool).
+    """
+
+    def __init__(self, timeout=10.0, max_connections=20, max_keepalive=10):
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=self.limits,
+                cookies=DEFAULT_COOKIES,
+            )
+        return self._client
+
+    async def get(self, url, headers=None):
+        """GET simples. Devolve o httpx.Response ou None em erro de rede."""
+        try:
+            return await self._get_client().get(url, headers=headers)
+        except httpx.HTTPError as e:
+            print(f"   ⚠️ HTTP falhou ({type(e).__name__}): {url}")
+            return None
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,207 @@
+import base64
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+try:
+    from PIL import Image
+except ImportError:  # sem Pillow guarda o original, só não reduz
+    Image = None
+
+from fetch_cache import url_key, normalize_url
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+
+def _decode_data_uri(uri):
+    header, _, payload = uri.partition(",")
+    if ";base64" in header: return base64.b64decode(payload)
+    return payload.encode()
+
+
+class ImageCache:
+    """Miniaturas locais das imagens das manchetes.
+
+    Baixa em paralelo só o que falta, reduz para o tamanho do grid (Pillow) e grava
+    em disco endereçado pelo conteúdo (sha1 da miniatura), com índice SQLite
+    URL -> hash e LRU por `accessed_at` acima de `max_bytes`. As mais usadas ficam
+    também em memória. Falhas são lembradas por `retry_after` segundos para não
+    refazer o download a cada rerender.
+    """
+
+    def __init__(self, root="data/thumbs", max_bytes=64 * 1024 * 1024, width=480, quality=80,
+                 mem_items=256, workers=8, timeout=8, retry_after=600):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.width = width
+        self.quality = quality
+        self.mem_items = mem_items
+        self.timeout = timeout
+        self.retry_after = retry_after
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._mem = OrderedDict()
+        self._failed = {}
+        self._pending = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self._client = httpx.Client(
+            timeout=timeout, follow_redirects=True, headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=workers, max_keepalive_connections=workers))
+        self._conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS thumbs (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                hash TEXT,
+                size INTEGER,
+                accessed_at REAL
+            )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_thumbs_accessed ON thumbs(accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_thumbs_hash ON thumbs(hash)")
+        self._conn.commit()
+        self.hits = self.misses = self.failures = 0
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest + ".img")
+
+    def _key(self, url):
+        # data: URI não passa pelo normalize_url (não é URL de rede)
+        if url.startswith("data:"): return hashlib.sha256(url.encode()).hexdigest()
+        return url_key(url)
+
+    def _remember(self, key, data):
+        self._mem[key] = data
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.mem_items: self._mem.popitem(last=False)
+
+    def _lookup(self, key):
+        """Memória -> disco. Chamar com o lock."""
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            return self._mem[key]
+        row = self._conn.execute("SELECT hash FROM thumbs WHERE key = ?", (key,)).fetchone()
+        if row is None: return None
+        try:
+            with open(self._path(row[0]), "rb") as f: data = f.read()
+        except OSError:
+            self._conn.execute("DELETE FROM thumbs WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute("UPDATE thumbs SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+        self._remember(key, data)
+        return data
+
+    def _shrink(self, raw):
+        if Image is None: return raw
+        try:
+            img = Image.open(io.BytesIO(raw))
+            img.draft("RGB", (self.width, self.width))  # JPEG decodifica já reduzido
+            if img.mode not in ("RGB", "L"): img = img.convert("RGB")
+            img.thumbnail((self.width, self.width * 2))
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=self.quality, optimize=True)
+            return out.getvalue()
+        except Exception:
+            return None  # não é imagem (HTML de erro, SVG...): cai no placeholder
+
+    def _download(self, url):
+        if url.startswith("data:"): return _decode_data_uri(url)
+        r = self._client.get(url)
+        if r.status_code != 200 or not r.headers.get("content-type", "image").startswith("image"): return None
+        return r.content
+
+    def _fetch(self, url, key):
+        try: data = self._shrink(self._download(url) or b"")
+        except Exception: data = None
+        if not data:
+            with self._lock:
+                self._failed[key] = time.time()
+                self.failures += 1
+            return None
+        digest = hashlib.sha1(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # único entre processos e threads
+            with open(tmp, "wb") as f: f.write(data)
+            os.replace(tmp, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO thumbs (key, url, hash, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, url[:64] if url.startswith("data:") else normalize_url(url), digest, len(data), time.time()))
+            self._conn.commit()
+            self._remember(key, data)
+            self._evict()
+        return data
+
+    def get_many(self, urls, wait=None):
+        """{url: bytes da miniatura ou None}. Baixa os que faltam em paralelo, uma vez.
+
+        Com `wait` (s), devolve o que ficou pronto nesse prazo; o resto continua baixando
+        em segundo plano e entra no cache para o próximo render.
+        """
+        out, futures = {}, {}
+        now = time.time()
+        with self._lock:
+            for url in dict.fromkeys(u for u in urls if u):
+                key = self._key(url)
+                data = self._lookup(key)
+                if data is not None:
+                    self.hits += 1
+                    out[url] = data
+                elif now - self._failed.get(key, 0) < self.retry_after:
+                    out[url] = None
+                else:
+                    fut = self._pending.get(key)
+                    if fut is None:
+                        self.misses += 1
+                        fut = self._pending[key] = self._pool.submit(self._fetch, url, key)
+                        fut.add_done_callback(lambda _, k=key: self._pending.pop(k, None))
+                    futures[url] = fut
+        deadline = time.monotonic() + (wait if wait is not None else self.timeout * 2)
+        for url, fut in futures.items():
+            try: out[url] = fut.result(timeout=max(0, deadline - time.monotonic()))
+            except Exception: out[url] = None
+        return out
+
+    def get(self, url):
+        return self.get_many([url]).get(url) if url else None
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM thumbs").fetchone()[0]
+        if total <= self.max_bytes: return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM thumbs ORDER BY accessed_at ASC"):
+            if total <= self.max_bytes: break
+            victims.append(key)
+            total -= size
+        hashes = {h for (h,) in self._conn.execute(
+            f"SELECT hash FROM thumbs WHERE key IN ({','.join('?' * len(victims))})", victims)}
+        self._conn.executemany("DELETE FROM thumbs WHERE key = ?", [(k,) for k in victims])
+        for key in victims: self._mem.pop(key, None)
+        # Mesmo arquivo pode servir várias URLs: só apaga o que ninguém mais usa
+        for digest in hashes:
+            if self._conn.execute("SELECT 1 FROM thumbs WHERE hash = ? LIMIT 1", (digest,)).fetchone(): continue
+            try: os.remove(self._path(digest))
+            except OSError: pass
+        self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            n, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM thumbs").fetchone()
+        return {"entries": n, "bytes": size, "memory": len(self._mem), "hits": self.hits,
+                "misses": self.misses, "failures": self.failures}
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self._client.close()
@@ -0,0 +1,209 @@
+"""Medição leve do pipeline: tempo por etapa, bytes, sucesso/falha por domínio, cache.
+
+    with metrics.span("fetch_article", domain="g1.globo.com") as sp:
+        ...
+        sp.bytes = len(html)      # opcional
+        sp.status = "empty"       # opcional (padrão "ok"; exceção vira "error")
+
+Tudo fica num registro em memória do processo. Saídas:
+- Prometheus (texto): `render_prometheus()`, `write_prometheus(path)` ou `start_http_server(port)`.
+- JSON-lines: uma linha por span em METRICS_LOG (se a variável estiver definida).
+- `summary()`: p50/p95/máx por etapa para o painel de debug do dashboard.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+PREFIX = "news_intel"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RECENT = 512  # durações guardadas por etapa para os percentis do painel
+
+_lock = threading.Lock()
+_counters = defaultdict(float)                       # (nome, labels) -> valor
+_hist = {}                                            # (nome, labels) -> [buckets..., soma, contagem]
+_recent = defaultdict(lambda: deque(maxlen=RECENT))  # nome -> durações recentes
+_log = None
+_log_path = os.getenv("METRICS_LOG")
+
+
+def _labels(d):
+    return tuple(sorted((k, str(v)) for k, v in d.items() if v is not None))
+
+
+def count(name, value=1, **labels):
+    with _lock: _counters[(name, _labels(labels))] += value
+
+
+def observe(name, seconds, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        h = _hist.get(key)
+        if h is None: h = _hist[key] = [0] * (len(BUCKETS) + 2)
+        for i, b in enumerate(BUCKETS):
+            if seconds <= b: h[i] += 1
+        h[-2] += seconds
+        h[-1] += 1
+        _recent[name].append(seconds)
+
+
+def _write_log(record):
+    global _log
+    if not _log_path: return
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        if _log is None:
+            os.makedirs(os.path.dirname(_log_path) or ".", exist_ok=True)
+            _log = open(_log_path, "a", encoding="utf-8", buffering=1)
+        _log.write(line + "\n")
+
+
+class Span:
+    __slots__ = ("name", "labels", "bytes", "status", "error", "started")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.bytes = None
+        self.status = "ok"
+        self.error = None
+        self.started = time.time()
+
+
+@contextmanager
+def span(name, **labels):
+    """Mede um trecho (sync ou dentro de coroutine). Exceção conta como "error" e é repassada."""
+    sp = Span(name, labels)
+    t = time.perf_counter()
+    try:
+        yield sp
+    except BaseException as e:
+        sp.status, sp.error = "error", f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        dur = time.perf_counter() - t
+        observe(f"{name}_seconds", dur, **sp.labels)
+        count(f"{name}_total", status=sp.status, **sp.labels)
+        if sp.bytes: count(f"{name}_bytes_total", sp.bytes, **sp.labels)
+        _write_log({"ts": round(sp.started, 3), "span": name, "ms": round(dur * 1000, 2), "status": sp.status,
+                    **sp.labels, **({"bytes": sp.bytes} if sp.bytes else {}), **({"error": sp.error} if sp.error else {})})
+
+
+def timed(name, **labels):
+    """Decorator: cada chamada vira um span (funciona em def e async def)."""
+    def deco(fn):
+        op = {"op": fn.__name__, **labels}
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*a, **kw):
+                with span(name, **op): return await fn(*a, **kw)
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            with span(name, **op): return fn(*a, **kw)
+        return wrapper
+    return deco
+
+
+# --- EXPORTAÇÃO ---
+def _fmt(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items: return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+def render_prometheus():
+    with _lock:
+        counters = dict(_counters)
+        hists = {k: list(v) for k, v in _hist.items()}
+    lines, typed = [], set()
+    for (name, labels), value in sorted(counters.items()):
+        metric = f"{PREFIX}_{name}"
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} counter")
+            typed.add(metric)
+        lines.append(f"{metric}{_fmt(labels)} {value:g}")
+    for (name, labels), h in sorted(hists.items()):
+        metric = f"{PREFIX}_{name}"
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} histogram")
+            typed.add(metric)
+        for b, n in zip(BUCKETS, h):
+            lines.append(f"{metric}_bucket{_fmt(labels, [('le', f'{b:g}')])} {n}")
+        lines.append(f"{metric}_bucket{_fmt(labels, [('le', '+Inf')])} {h[-1]}")
+        lines.append(f"{metric}_sum{_fmt(labels)} {h[-2]:.6f}")
+        lines.append(f"{metric}_count{_fmt(labels)} {h[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Arquivo no formato do textfile collector do node_exporter (escrita atômica)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f: f.write(render_prometheus())
+    os.replace(tmp, path)
+
+
+def start_http_server(port, host="0.0.0.0"):
+    """Endpoint /metrics numa thread daemon."""
+    # http.server puxa email/html/etc.; só quem expõe o endpoint paga o import
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args): pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
+
+
+def _pct(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def summary():
+    """Por etapa: chamadas, erros, p50/p95/máx (ms) das últimas execuções, bytes e cache."""
+    with _lock:
+        counters = dict(_counters)
+        recent = {k: sorted(v) for k, v in _recent.items()}
+    stages = {}
+    for name, values in recent.items():
+        stage = name[:-len("_seconds")]
+        stages[stage] = {"calls": 0, "errors": 0, "p50_ms": round(_pct(values, 0.5) * 1000, 1),
+                         "p95_ms": round(_pct(values, 0.95) * 1000, 1), "max_ms": round(values[-1] * 1000, 1), "bytes": 0}
+    domains = defaultdict(lambda: {"ok": 0, "fail": 0})
+    cache = defaultdict(float)
+    for (name, labels), value in counters.items():
+        lab = dict(labels)
+        if name.endswith("_bytes_total") and name[:-12] in stages:
+            stages[name[:-12]]["bytes"] += int(value)
+        elif name.endswith("_total") and name[:-6] in stages:
+            st = stages[name[:-6]]
+            st["calls"] += int(value)
+            if lab.get("status") == "error": st["errors"] += int(value)
+            if "domain" in lab:
+                domains[lab["domain"]]["ok" if lab.get("status") in ("ok", "not_modified") else "fail"] += int(value)
+        elif name == "cache_lookups_total":
+            cache[f"{lab.get('kind')}:{lab.get('result')}"] += value
+    return {"stages": stages, "domains": dict(domains), "cache": dict(cache)}
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _hist.clear()
+        _recent.clear()
@@ -0,0 +1,101 @@
+"""Monta o bloco de fontes do prompt dentro de um orçamento de tokens.
+
+Em vez de cortar cada fonte em 2500 caracteres, divide o orçamento entre as fontes
+(quem precisa de menos devolve a sobra) e, dentro de cada fonte, fica com os
+parágrafos mais salientes: o lide e as frases que só aquela fonte traz.
+"""
+import hashlib
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+# Orçamento de tokens reservado às fontes, por modelo
+MODEL_BUDGETS = {
+    'gemini-2.5-flash-lite': 12000,
+    'gemini-2.5-flash': 24000,
+}
+DEFAULT_BUDGET = 12000
+MIN_PARAGRAPH = 40  # linhas menores que isso quase sempre são menu, crédito, legenda
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+@lru_cache(maxsize=65536)
+def estimate_tokens(text):
+    """Estimativa de tokens (~4 caracteres por pedaço de palavra + pontuação). Memoizada."""
+    return sum(max(1, math.ceil(len(t) / 4)) if t[0].isalnum() else 1 for t in _TOKEN.findall(text))
+
+
+@lru_cache(maxsize=512)
+def _passages(content):
+    """Parágrafos do texto com seus tokens; mesma fonte entre chamadas = zero retrabalho."""
+    paras = [p.strip() for p in re.split(r"\n\s*\n|\n", content)]
+    return tuple((p, estimate_tokens(p)) for p in paras if p)
+
+
+def _sentence_keys(paragraph):
+    return {hashlib.md5(s.lower().encode()).hexdigest()[:12] for s in _SENTENCE.split(paragraph) if len(s) > 20}
+
+
+def _score(paragraph, idx, sentence_freq):
+    lead = 1.0 / (1.0 + 0.25 * idx)
+    keys = _sentence_keys(paragraph)
+    unique = sum(1 for k in keys if sentence_freq[k] == 1) / len(keys) if keys else 0.5
+    size = 0.3 if len(paragraph) < MIN_PARAGRAPH else 1.0
+    return (0.5 + unique) * lead * size
+
+
+def _allocate(demands, budget):
+    """Divisão justa ("water-filling"): ninguém recebe mais do que precisa; a sobra é redistribuída."""
+    alloc = [0] * len(demands)
+    open_ = [i for i, d in enumerate(demands) if d > 0]
+    left = budget
+    while open_ and left > 0:
+        share = left // len(open_)
+        if share == 0: break
+        still = []
+        for i in open_:
+            give = min(share, demands[i] - alloc[i])
+            alloc[i] += give
+            left -= give
+            if alloc[i] < demands[i]: still.append(i)
+        open_ = still
+    return alloc
+
+
+def budget_for(model):
+    return MODEL_BUDGETS.get(model, DEFAULT_BUDGET)
+
+
+def pack_sources(articles, budget):
+    """Devolve, para cada artigo, o trecho do corpo que cabe na sua fatia do orçamento."""
+    passages = [_passages(str(a.get('content') or "")) for a in articles]
+
+    # Frases repetidas entre fontes valem menos (a outra fonte já vai dizer)
+    sentence_freq = Counter()
+    for paras in passages:
+        seen = set()
+        for p, _ in paras: seen |= _sentence_keys(p)
+        sentence_freq.update(seen)
+
+    overhead = [estimate_tokens(f"## {a.get('source_domain', '')}\n{a.get('title', '')}\n") for a in articles]
+    demands = [sum(t for _, t in paras) for paras in passages]
+    alloc = _allocate(demands, max(0, budget - sum(overhead)))
+
+    packed = []
+    for paras, quota in zip(passages, alloc):
+        ranked = sorted(range(len(paras)), key=lambda i: _score(paras[i][0], i, sentence_freq), reverse=True)
+        chosen, used = set(), 0
+        for i in ranked:
+            if used + paras[i][1] <= quota:
+                chosen.add(i)
+                used += paras[i][1]
+        if not chosen and paras and quota > 0:
+            # Nem o melhor parágrafo coube inteiro: vai cortado no tamanho da fatia
+            best = paras[ranked[0]][0]
+            packed.append(best[:quota * 4])
+            continue
+        packed.append("\n".join(paras[i][0] for i in sorted(chosen)))
+    return packed
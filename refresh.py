@@ -0,0 +1,68 @@
+"""Atualização incremental de manchetes.
+
+Cada refresh vira um snapshot no banco; o diff contra o anterior diz o que é novo,
+o que saiu e o que só mudou de título. Deep dive + dossiê só rodam para histórias
+novas ou cujo conjunto de links (fontes) mudou desde o último processamento.
+"""
+import hashlib
+import database as db
+
+
+def diff_headlines(old, new):
+    """Compara duas listas de manchetes pela URL: novas, removidas e retituladas."""
+    old_by = {it['url']: it for it in old or []}
+    new_by = {it['url']: it for it in new or []}
+    retitled = [
+        {"url": url, "old_title": old_by[url]['title'], "title": it['title']}
+        for url, it in new_by.items() if url in old_by and old_by[url]['title'] != it['title']
+    ]
+    return {
+        "new": [it for url, it in new_by.items() if url not in old_by],
+        "removed": [it for url, it in old_by.items() if url not in new_by],
+        "retitled": retitled,
+        "unchanged": sum(1 for url in new_by if url in old_by) - len(retitled),
+    }
+
+
+def describe(diff):
+    return f"🆕 {len(diff['new'])} novas · ✏️ {len(diff['retitled'])} retituladas · 🗑️ {len(diff['removed'])} saíram"
+
+
+def record_snapshot(topic, news):
+    """Grava o snapshot do tópico, atualiza o estado das histórias e devolve o diff."""
+    old = db.get_latest_headlines(topic['url'])
+    diff = diff_headlines(old, news)
+    db.save_headline_snapshot(topic['url'], topic['title'], news)
+    db.touch_stories(topic['url'], news)
+    return diff
+
+
+def refresh_topic(agg, topic):
+    """Varre o tópico ao vivo (ignora a cópia fresca do cache). Devolve (manchetes, diff) ou (None, None)."""
+    news = agg.get_headlines_from_topic(topic['url'], revalidate=True)
+    if not news: return None, None
+    return news, record_snapshot(topic, news)
+
+
+def links_fingerprint(links):
+    return hashlib.sha1("\n".join(sorted(links)).encode()).hexdigest()
+
+
+def stories_needing_work(agg, items):
+    """Histórias que precisam de deep dive: nunca processadas ou com fontes diferentes.
+
+    Devolve [(item, links_hash)]; depois do dossiê pronto, chame
+    db.mark_story_dived(item['url'], links_hash).
+    """
+    states = db.get_story_states(it['url'] for it in items)
+    todo = []
+    for it in items:
+        # Só a página da história (cacheada), sem abrir nenhum artigo
+        try: links_hash = links_fingerprint(agg.get_story_links(it['url']))
+        except Exception as e:
+            print(f"   ⚠️ Não deu pra ler a história ({e}): {it['title'][:50]}")
+            continue
+        state = states.get(it['url'])
+        if not state or state.get('links_hash') != links_hash:
+            todo.append((it, links_hash))
+    return todo
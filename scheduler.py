@@ -0,0 +1,101 @@
+import asyncio
+import random
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Balde de fichas: `rate` requisições/s com rajada de até `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def take(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class FetchScheduler:
+    """Agenda downloads com teto global, limite por domínio, timeout, retry e prazo total.
+
+    Deve ser usado sempre do mesmo event loop (o do CrawlerPool): o semáforo e os
+    baldes são compartilhados entre todas as histórias abertas ao mesmo tempo.
+    """
+
+    def __init__(self, max_concurrency=6, per_domain_rate=2.0, per_domain_burst=4,
+                 request_timeout=25.0, retries=2, backoff=0.5, domain_rates=None):
+        self.max_concurrency = max_concurrency
+        self.per_domain_rate = per_domain_rate
+        self.per_domain_burst = per_domain_burst
+        self.request_timeout = request_timeout
+        self.retries = retries
+        self.backoff = backoff
+        # Ex.: {"news.google.com": (5, 10)} -> (rate, burst) específicos
+        self.domain_rates = domain_rates or {}
+        self._sem = None
+        self._buckets = {}
+
+    def _bucket(self, url):
+        host = urlparse(url).netloc.lower().replace("www.", "")
+        if host not in self._buckets:
+            rate, burst = self.domain_rates.get(host, (self.per_domain_rate, self.per_domain_burst))
+            self._buckets[host] = TokenBucket(rate, burst)
+        return self._buckets[host]
+
+    async def _run_one(self, url, fetch):
+        """Tenta `fetch(url)` com retry exponencial. Exceção = tentar de novo; None = desistir."""
+        if self._sem is None: self._sem = asyncio.Semaphore(self.max_concurrency)
+        bucket = self._bucket(url)
+        for attempt in range(self.retries + 1):
+            await bucket.take()
+            async with self._sem:
+                try:
+                    return await asyncio.wait_for(fetch(url), self.request_timeout)
+                except asyncio.TimeoutError:
+                    print(f"   ⏱️ Timeout ({self.request_timeout:.0f}s): {url}")
+                except Exception as e:
+                    print(f"   ⚠️ Falha ({type(e).__name__}) tentativa {attempt + 1}: {url}")
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * (2 ** attempt) * random.uniform(0.8, 1.2))
+        return None
+
+    async def gather(self, urls, fetch, deadline=45.0, quorum=None, grace=5.0, on_result=None):
+        """Roda `fetch` para cada URL e devolve os resultados não nulos por ordem de chegada.
+
+        Para no prazo `deadline` (s) ou, depois de `quorum` resultados, no máximo
+        `grace` segundos a mais esperando os retardatários. O resto é cancelado.
+        `quorum=0` (já atingido, ex.: pelo cache) abre a janela de `grace` logo no início;
+        `quorum=None` espera até o prazo.
+        """
+        loop = asyncio.get_running_loop()
+        pending = {asyncio.ensure_future(self._run_one(u, fetch)) for u in urls}
+        end = loop.time() + deadline
+        if quorum is not None and quorum <= 0: end = min(end, loop.time() + grace)
+        results = []
+        try:
+            while pending:
+                timeout = end - loop.time()
+                if timeout <= 0: break
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    res = task.result()
+                    if res is None: continue
+                    results.append(res)
+                    if on_result: on_result(res)
+                    if quorum and len(results) == quorum and pending:
+                        end = min(end, loop.time() + grace)
+        finally:
+            for task in pending: task.cancel()
+        if pending: print(f"   ✂️ Prazo atingido: {len(results)} fontes, {len(pending)} abandonadas")
+        return results
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos do projeto ficam na raiz do repositório
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    """database.py apontando para um banco novo e vazio."""
+    import database as db
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "test.db"))
+    yield db
+    db.close_conn()
@@ -0,0 +1,72 @@
+import json
+from concurrent.futures import Future
+
+import batch
+
+
+def write(path, records, tail=""):
+    path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records) + tail, encoding="utf-8")
+    return str(path)
+
+
+def topic_rec(url, title, stories, status="ok"):
+    return {"key": f"topic:{url}", "type": "topic", "status": status, "topic": {"title": title, "url": url},
+            "headlines": [{"url": u, "title": f"Manchete {u[-1]}"} for u in stories]}
+
+
+def test_done_keys_only_ok(tmp_path):
+    path = write(tmp_path / "out.jsonl", [
+        {"key": "story:https://s/1", "status": "ok"},
+        {"key": "story:https://s/2", "status": "error"},
+        {"key": "topic:https://t/1", "status": "ok"},
+    ])
+    assert batch.done_keys(path) == {"story:https://s/1", "topic:https://t/1"}
+    assert batch.done_keys(str(tmp_path / "nao-existe.jsonl")) == set()
+    assert batch.done_keys(None) == set()
+
+
+def test_done_keys_ignores_truncated_last_line(tmp_path):
+    # Processo morto no meio da escrita: a última linha fica pela metade
+    path = write(tmp_path / "out.jsonl", [{"key": "story:https://s/1", "status": "ok"}],
+                 tail='{"key": "story:https://s/2", "status": "o')
+    assert batch.done_keys(path) == {"story:https://s/1"}
+
+
+def test_runner_skips_done_keys(tmp_path):
+    class Executor:
+        def __init__(self):
+            self.jobs = []
+
+        def submit(self, fn, shard):
+            self.jobs += shard
+            fut = Future()
+            fut.set_result([{"key": j["key"], "type": j["type"], "status": "ok"} for j in shard])
+            return fut
+
+    ex, out = Executor(), (tmp_path / "out.jsonl").open("w", encoding="utf-8")
+    jobs = [batch.story_job(f"https://s/{i}") for i in range(5)]
+    runner = batch.Runner(ex, out, {"story:https://s/1", "story:https://s/3"}, shard_size=2)
+    runner.run(jobs)
+    out.close()
+    assert [j["url"] for j in ex.jobs] == ["https://s/0", "https://s/2", "https://s/4"]
+    assert runner.ok == 3 and len((tmp_path / "out.jsonl").read_text().splitlines()) == 3
+
+
+def test_previous_dives_requeues_skipped_topics(tmp_path):
+    path = write(tmp_path / "out.jsonl", [
+        topic_rec("https://t/1", "Brasil", ["https://s/1", "https://s/2", "https://s/3"]),
+        topic_rec("https://t/2", "Mundo", ["https://s/4"]),
+        topic_rec("https://t/3", "Esportes", ["https://s/5"], status="error"),
+    ], tail='{"key": "topic:https://t/4", "status": "ok", "head')
+    topics = [{"title": "Brasil", "url": "https://t/1"}, {"title": "Esportes", "url": "https://t/3"}]
+    skip = batch.done_keys(path)
+
+    jobs = batch.previous_dives(path, skip, topics, dive=2)
+    # Só tópicos pedidos agora e pulados pelo resume; top-N de cada um, com o tópico de origem
+    assert jobs == [batch.story_job("https://s/1", "Manchete 1", "Brasil"),
+                    batch.story_job("https://s/2", "Manchete 2", "Brasil")]
+
+
+def test_shards_of():
+    assert batch.shards_of(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+    assert batch.shards_of([], 4) == []
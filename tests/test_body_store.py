@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+import body_store
+
+WORDS = "governo eleição mercado inflação juros saúde vacina futebol congresso reforma ação coração".split()
+
+
+def body(seed, n=400):
+    rnd = random.Random(seed)
+    return "\n".join(" ".join(rnd.choice(WORDS) for _ in range(12)) + "." for _ in range(n // 12))
+
+
+codecs = ["zlib"] + (["zstd"] if body_store.zstd else [])
+
+
+@pytest.fixture(params=codecs)
+def codec(request, monkeypatch):
+    if request.param == "zlib": monkeypatch.setattr(body_store, "zstd", None)
+    return request.param
+
+
+def test_roundtrip(codec):
+    text = body(1) + "\nAcentuação, emoji 🧿 e ç no fim"
+    got_codec, blob = body_store.compress(text)
+    assert got_codec == codec
+    assert len(blob) < len(text.encode())
+    assert body_store.decompress(got_codec, blob) == text
+
+
+def test_incremental_roundtrip(codec):
+    text = body(2, 4000)
+    c, blob = body_store.compress(text)
+    dec = body_store.decompressobj(c)
+    # Pedaços pequenos cortam caracteres multibyte ao meio: quem lê precisa do decoder incremental
+    raw = b"".join(dec.decompress(blob[i:i + 7]) for i in range(0, len(blob), 7))
+    assert raw.decode("utf-8") == text
+
+
+@pytest.mark.skipif(body_store.zstd is None, reason="zstandard não instalado")
+def test_dictionary_roundtrip():
+    data = body_store.train_dictionary([body(i) for i in range(200)], size=8 * 1024)
+    text = body(999)
+    c, blob = body_store.compress(text, 1, data)
+    assert c == "zstd-dict"
+    assert body_store.decompress(c, blob, 1, data) == text
+    with pytest.raises(RuntimeError): body_store.decompressobj(c, 1, None)
+
+
+def test_db_bodies_are_content_addressed(tmp_db):
+    shared, own = body(10, 2000), body(11, 2000)
+    arts = [{"title": "A", "source_domain": "a.com", "url": "https://a.com/1", "content": shared},
+            {"title": "B", "source_domain": "b.com", "url": "https://b.com/1", "content": own}]
+    r1 = tmp_db.save_full_report("u1", "Tópico", "Resumo 1", arts)
+    r2 = tmp_db.save_full_report("u2", "Tópico", "Resumo 2", arts[:1])
+    stats = tmp_db.body_store_stats()
+    assert stats["bodies"] == 2 and stats["references"] == 3
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+
+    sources = tmp_db.get_report_sources(r1)
+    assert [s["content"] for s in sources] == [shared, own]
+    h = sources[0]["body_hash"]
+    assert h == body_store.content_hash(shared)
+    assert tmp_db.get_report_sources(r2)[0]["body_hash"] == h
+    assert tmp_db.get_article_body(h) == shared
+    assert "".join(tmp_db.iter_article_body(h, chunk_size=100)) == shared
+    assert tmp_db.get_article_body("0" * 64) is None
+    assert list(tmp_db.iter_article_body("0" * 64)) == []
+
+
+@pytest.mark.skipif(body_store.zstd is None, reason="zstandard não instalado")
+def test_db_dictionary_keeps_old_bodies_readable(tmp_db):
+    arts = [{"title": f"T{i}", "source_domain": "a.com", "url": f"https://a.com/{i}", "content": body(i)} for i in range(60)]
+    tmp_db.save_full_report("u1", "Tópico", "Resumo", arts)
+    assert tmp_db.train_body_dictionary(size=8 * 1024)
+    fresh = {"title": "Nova", "source_domain": "a.com", "url": "https://a.com/new", "content": body(500)}
+    rid = tmp_db.save_full_report("u2", "Tópico", "Resumo", [fresh])
+    assert "zstd-dict" in tmp_db.body_store_stats()["codecs"]
+    assert tmp_db.get_report_sources(rid)[0]["content"] == fresh["content"]
+    assert tmp_db.get_article_body(body_store.content_hash(arts[0]["content"])) == arts[0]["content"]
+
+
+@pytest.mark.skipif(body_store.zstd is None, reason="zstandard não instalado")
+@pytest.mark.parametrize("with_dict", [False, True])
+def test_interleaved_streams_in_one_thread(with_dict):
+    # iter_article_body suspenso + outra leitura na mesma thread não podem dividir contexto
+    data = body_store.train_dictionary([body(i) for i in range(200)], size=8 * 1024) if with_dict else None
+    first, other = body(1, 4000), body(2, 4000)
+    c1, blob1 = body_store.compress(first, 1, data)
+    c2, blob2 = body_store.compress(other, 1, data)
+    half = len(blob1) // 2
+    stream = body_store.decompressobj(c1, 1, data)
+    raw = stream.decompress(blob1[:half])
+    assert body_store.decompress(c2, blob2, 1, data) == other
+    second = body_store.decompressobj(c2, 1, data)
+    assert second.decompress(blob2).decode("utf-8") == other
+    raw += stream.decompress(blob1[half:])
+    assert raw.decode("utf-8") == first
+
+
+def test_interleaved_body_readers(tmp_db):
+    texts = [body(20, 3000), body(21, 3000)]
+    arts = [{"title": f"T{i}", "source_domain": "a.com", "url": f"https://a.com/{i}", "content": t}
+            for i, t in enumerate(texts)]
+    tmp_db.save_full_report("u1", "Tópico", "Resumo", arts)
+    h0, h1 = (body_store.content_hash(t) for t in texts)
+    it = tmp_db.iter_article_body(h0, chunk_size=64)
+    got = next(it)
+    assert tmp_db.get_article_body(h1) == texts[1]
+    assert "".join(tmp_db.iter_article_body(h1, chunk_size=50)) == texts[1]
+    got += "".join(it)
+    assert got == texts[0]
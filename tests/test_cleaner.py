@@ -0,0 +1,60 @@
+import pytest
+
+from cleaner import Cleaner
+
+# Frases de notícia que citam rede social / verbo de chamada e precisam sobreviver
+KEEP = [
+    "Telegram é bloqueado no Brasil por decisão do STF",
+    "O WhatsApp lançou nova função nesta terça-feira.",
+    "Meta anuncia mudanças no Instagram para adolescentes.",
+    "A ministra assinou o decreto na manhã desta segunda.",
+    "Google adia de novo o fim dos cookies de terceiros.",
+    "Acordo entre [Lula](https://g1.globo.com/lula) e o Congresso destrava a pauta.",
+    "Polícia siga as pistas, diz delegado",
+    "O Twitter, hoje X, perdeu anunciantes em 2024.",
+]
+
+DROP = [
+    "Leia também: Inflação desacelera em outubro",
+    "**Leia mais**",
+    "Veja também",
+    "Siga a Crusoé",
+    "Siga o g1 no Instagram",
+    "Assine a newsletter",
+    "Inscreva-se no canal",
+    "Receba as notícias da Itatiaia no seu WhatsApp",
+    "Clique aqui e participe",
+    "Baixe o app do jornal",
+    "Itatiaia © Todos os direitos reservados. Rádio Itatiaia Ltda.",
+    "Este site usa cookies para melhorar sua experiência.",
+    "Receba no [WhatsApp](https://wa.me/123) as principais manchetes",
+    "[Assine](https://assine.jornal.com.br) e tenha acesso ilimitado",
+    "- Compartilhe",
+    "4.6K",
+    "[Facebook](https://fb.com/x) [Twitter](https://x.com/y)",
+]
+
+
+@pytest.mark.parametrize("line", KEEP)
+def test_keeps_news_sentences(line):
+    assert Cleaner().clean(line) == line
+
+
+@pytest.mark.parametrize("line", DROP)
+def test_drops_boilerplate(line):
+    assert Cleaner().clean(line) == ""
+
+
+def test_long_paragraph_with_term_survives():
+    para = ("Siga a reportagem: " + "o governo anunciou um pacote de medidas para conter a alta dos preços " * 2).strip()
+    assert Cleaner().clean(para) == para
+
+
+def test_learns_domain_boilerplate():
+    c = Cleaner(min_pages=3)
+    footer = "Diário do Comércio — o jornal de negócios de Minas Gerais desde 1932."
+    for i in range(4):
+        out = c.clean(f"Matéria número {i} sobre a economia mineira\n{footer}", "diariodocomercio.com.br")
+    assert footer not in out
+    assert out == "Matéria número 3 sobre a economia mineira"
+    assert c.stats()["diariodocomercio.com.br"]["boilerplate_lines"] == 1
@@ -0,0 +1,52 @@
+import threading
+
+import pytest
+
+
+def in_thread(fn):
+    out = []
+    t = threading.Thread(target=lambda: out.append(fn()))
+    t.start()
+    t.join()
+    return out[0]
+
+
+def test_connection_reused_across_threads(tmp_db):
+    # Cada rerun do Streamlit vem numa thread nova: a conexão ociosa tem que servir para ela
+    def borrow():
+        with tmp_db.connection() as conn:
+            conn.execute("SELECT COUNT(*) FROM reports").fetchone()
+            return id(conn)
+    first = in_thread(borrow)
+    assert in_thread(borrow) == first == borrow()
+
+
+def test_pool_keeps_at_most_pool_size(tmp_db, monkeypatch):
+    monkeypatch.setattr(tmp_db, "POOL_SIZE", 2)
+    monkeypatch.setattr(tmp_db, "_pools", {})
+    conns = []
+    ctxs = [tmp_db.connection() for _ in range(4)]
+    for ctx in ctxs: conns.append(ctx.__enter__())
+    assert len({id(c) for c in conns}) == 4  # emprestadas ao mesmo tempo: nunca a mesma
+    for ctx in ctxs: ctx.__exit__(None, None, None)
+    assert tmp_db._pools[tmp_db.DB_NAME].qsize() == 2
+
+
+def test_failed_transaction_rolls_back_and_returns_connection(tmp_db):
+    with pytest.raises(RuntimeError):
+        with tmp_db.transaction() as c:
+            c.execute("INSERT INTO reports (topic_url, topic_name, summary_text) VALUES ('u', 't', 's')")
+            raise RuntimeError("falhou no meio")
+    assert tmp_db.count_reports() == 0
+    with tmp_db.connection() as conn:
+        assert not conn.in_transaction
+
+
+def test_concurrent_writers(tmp_db):
+    def write(n):
+        for i in range(20):
+            tmp_db.save_headline_snapshot(f"T{n}", "Tópico", [{"title": f"{n}-{i}", "url": f"u{n}-{i}"}])
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(6)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert all(tmp_db.get_latest_headlines(f"T{n}")[0]["title"] == f"{n}-19" for n in range(6))
@@ -0,0 +1,39 @@
+from dedup import dedup_articles, minhash, similarity
+
+AGENCIA = ("O Comitê de Política Monetária do Banco Central decidiu nesta quarta-feira manter a taxa básica "
+           "de juros em 10,5% ao ano, interrompendo o ciclo de cortes iniciado em agosto do ano passado. "
+           "Em comunicado, o colegiado citou a incerteza fiscal e a desancoragem das expectativas de inflação.")
+
+
+def art(dom, content):
+    return {"title": f"Matéria {dom}", "source_domain": dom, "url": f"https://{dom}/m", "content": content}
+
+
+def test_similarity_bounds():
+    assert similarity(minhash(AGENCIA), minhash(AGENCIA)) == 1.0
+    assert similarity(minhash(AGENCIA), minhash("Chuva forte alaga ruas do centro de Porto Alegre nesta manhã")) < 0.2
+
+
+def test_agency_copies_collapse_into_longest():
+    sources = [
+        art("g1.globo.com", "Texto próprio do g1 sobre a reação do mercado financeiro à decisão do Copom e o dólar."),
+        art("istoedinheiro.com.br", AGENCIA),
+        art("correiobraziliense.com.br", AGENCIA + " Leia mais no site."),
+        art("agenciabrasil.ebc.com.br", AGENCIA),
+    ]
+    kept = dedup_articles(sources)
+    assert [a["source_domain"] for a in kept] == ["g1.globo.com", "correiobraziliense.com.br"]
+    assert kept[0]["also_published_by"] == []
+    assert kept[1]["also_published_by"] == ["istoedinheiro.com.br", "agenciabrasil.ebc.com.br"]
+    assert "also_published_by" not in sources[2]  # não mexe nos dicts de entrada
+
+
+def test_distinct_sources_kept_in_order():
+    sources = [art(f"site{i}.com.br", f"Texto totalmente diferente número {i} " * 5 + AGENCIA[i * 20:i * 20 + 40])
+               for i in range(3)]
+    assert [a["source_domain"] for a in dedup_articles(sources)] == [a["source_domain"] for a in sources]
+
+
+def test_single_source_untouched():
+    sources = [art("g1.globo.com", AGENCIA)]
+    assert dedup_articles(sources) is sources
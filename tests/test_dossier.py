@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import dossier
+
+
+def art(i):
+    body = " ".join(f"Parágrafo {i}.{p}: detalhe exclusivo número {i * 100 + p} sobre a votação." for p in range(5))
+    return {"title": f"Fonte {i}", "source_domain": f"site{i}.com.br", "url": f"https://site{i}.com.br/m/{i}", "content": body}
+
+
+class FakeClient:
+    def __init__(self):
+        self.models = self
+
+    def generate_content_stream(self, model, contents):
+        return iter([SimpleNamespace(text="Dossiê "), SimpleNamespace(text="do quórum")])
+
+
+def fake_model(monkeypatch):
+    calls = []
+    monkeypatch.setattr(dossier, "_client", lambda api_key: FakeClient())
+
+    def call(prompt, api_key, mode="full"):
+        calls.append((mode, prompt))
+        return f"Dossiê {len(calls)} ({mode})"
+
+    monkeypatch.setattr(dossier, "_call_model", call)
+    return calls
+
+
+def test_same_sources_come_from_cache(tmp_db, monkeypatch):
+    calls = fake_model(monkeypatch)
+    url = "https://news.google.com/stories/S1"
+    assert dossier.get_or_build_report(url, "História", [art(i) for i in range(4)], "k") == ("Dossiê 1 (full)", "full")
+    assert dossier.get_or_build_report(url, "História", [art(i) for i in range(4)], "k") == ("Dossiê 1 (full)", "cache")
+    assert len(calls) == 1
+
+
+def stream_quorum(url, used):
+    mode, chunks = dossier.stream_report(url, "História", used, "k", save=False)
+    return "".join(chunks), mode
+
+
+def test_late_sources_update_incrementally(tmp_db, monkeypatch):
+    calls = fake_model(monkeypatch)
+    url = "https://news.google.com/stories/S2"
+    used = [art(i) for i in range(4)]
+    text, mode = stream_quorum(url, used)
+    assert tmp_db.count_reports() == 0  # o quórum sozinho não vira relatório
+
+    # 6 fontes novas em 10 passariam do MAX_DELTA_RATIO, mas completam o quórum pelo incremental
+    text, mode = dossier.finish_report(url, "História", text, used, [art(i) for i in range(10)], "k")
+    assert mode == "incremental"
+    prompt = calls[-1][1]
+    assert "Dossiê do quórum" in prompt and "Fonte 9" in prompt and "Fonte 0" not in prompt
+    # Um relatório só, salvo para o conjunto completo
+    assert tmp_db.count_reports() == 1
+    assert dossier.get_or_build_report(url, "História", [art(i) for i in range(10)], "k") == (text, "cache")
+
+
+def test_no_late_sources_saves_quorum_once(tmp_db, monkeypatch):
+    calls = fake_model(monkeypatch)
+    url = "https://news.google.com/stories/S4"
+    used = [art(i) for i in range(4)]
+    text, _ = stream_quorum(url, used)
+    assert dossier.finish_report(url, "História", text, used, used, "k") == (text, "unchanged")
+    assert tmp_db.count_reports() == 1
+    # Dossiê vindo do cache não é salvo de novo
+    text, mode = stream_quorum(url, used)
+    assert mode == "cache"
+    dossier.finish_report(url, "História", text, used, used, "k", saved=True)
+    assert tmp_db.count_reports() == 1
+
+
+def test_large_delta_regenerates_by_default(tmp_db, monkeypatch):
+    fake_model(monkeypatch)
+    url = "https://news.google.com/stories/S3"
+    dossier.get_or_build_report(url, "História", [art(i) for i in range(4)], "k")
+    assert dossier.get_or_build_report(url, "História", [art(i) for i in range(10)], "k")[1] == "full"
@@ -0,0 +1,33 @@
+import pytest
+
+from extract import extract_story_links, google_news_id
+
+BASE = "https://news.google.com"
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://news.google.com/articles/CBMiX?hl=pt-BR", "articles/CBMiX"),
+    ("https://news.google.com/read/CBMiY", "read/CBMiY"),
+    ("https://news.google.com/stories/CAAq/abc", "stories/CAAq"),
+    ("./articles/CBMiZ", "articles/CBMiZ"),
+    ("/read/CBMiW?x=1", "read/CBMiW"),
+    # Publisher com o mesmo formato de caminho não é redirect do Google News
+    ("https://www.estadao.com.br/read/materia-qualquer", None),
+    ("https://g1.globo.com/stories/2024/eleicao", None),
+    ("https://news.google.com/topics/CAAq", None),
+    ("", None),
+    (None, None),
+])
+def test_google_news_id(url, expected):
+    assert google_news_id(url) == expected
+
+
+def test_google_news_id_follows_base_url():
+    assert google_news_id("http://127.0.0.1:8765/articles/A1", "http://127.0.0.1:8765") == "articles/A1"
+    assert google_news_id("https://news.google.com/articles/A1", "http://127.0.0.1:8765") is None
+
+
+def test_story_links_in_order_without_repeats():
+    html = ('<a href="./articles/A1">1</a><a href="https://news.google.com/read/R1">2</a>'
+            '<a href="./topics/T1">x</a><a href="./articles/A1">1 de novo</a><a href="https://g1.globo.com/m">y</a>')
+    assert extract_story_links(html, BASE) == [f"{BASE}/articles/A1", f"{BASE}/read/R1"]
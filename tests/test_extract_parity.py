@@ -0,0 +1,197 @@
+"""Paridade do extrator rápido (lxml, extract.py) contra a lógica original em BeautifulSoup.
+
+As funções `*_bs4` abaixo são a implementação original, mantidas só como referência.
+Roda sobre a página sintética, casos de borda e, se existirem, as páginas gravadas
+em benchmarks/fixtures (python benchmarks/replay.py record ...).
+"""
+import glob
+import gzip
+import os
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+from extract import MENU_PRIORITY, _menu_rank, clean_image_url, extract_headlines, extract_menu_topics
+
+BASE = "https://news.google.com"
+FIXTURE_PAGES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures", "pages", "*")))
+
+
+# --- REFERÊNCIA (BeautifulSoup + html.parser) ---
+def extract_headlines_bs4(html, base_url, clean_image):
+    soup = BeautifulSoup(html, 'html.parser')
+    headlines = []
+    seen = set()
+
+    # CAÇADOR DE LINKS BRUTO (Foda-se a tag article)
+    all_links = soup.find_all('a', href=True)
+
+    for a in all_links:
+        href = a['href']
+
+        # Aceita stories (cobertura) E articles (manchetes diretas)
+        is_story = "./stories/" in href
+        is_article = "./articles/" in href
+
+        if not (is_story or is_article): continue
+
+        full_link = href.replace(".", base_url, 1)
+        if full_link in seen: continue
+
+        # Tenta pegar título do link
+        title = a.get_text(strip=True)
+
+        # Se título for ruim ("Veja mais"), sobe na árvore pra achar o pai
+        card_block = None
+        parent = a.parent
+        # Sobe até achar um container que tenha imagem ou texto grande
+        for _ in range(4):
+            if parent:
+                if parent.find('img') or parent.find('h3') or parent.find('h4'):
+                    card_block = parent
+                    break
+                parent = parent.parent
+
+        if card_block:
+            # Tenta achar H3/H4
+            h = card_block.find(['h3', 'h4'])
+            if h:
+                title = h.get_text(strip=True)
+            elif len(title) < 10:
+                # Pega o maior link de texto dentro do bloco
+                sub_links = card_block.find_all('a')
+                valid_texts = [l.get_text(strip=True) for l in sub_links]
+                if valid_texts: title = max(valid_texts, key=len)
+
+        if len(title) < 10: continue
+
+        # Imagem
+        img_src = None
+        if card_block:
+            img = card_block.find('img')
+            if img:
+                raw = img.get('src') or img.get('data-src') or img.get('srcset', '').split(' ')[0]
+                img_src = clean_image(raw)
+
+        headlines.append({
+            "title": title,
+            "url": full_link,
+            "image": img_src,
+            "is_cluster": is_story
+        })
+        seen.add(full_link)
+
+    return headlines
+
+
+def extract_menu_topics_bs4(html, base_url):
+    soup = BeautifulSoup(html, 'html.parser')
+    topics = []
+    seen = set()
+    for a in soup.find_all('a', href=True):
+        href = a['href']
+        txt = a.get_text(strip=True)
+        if "./topics/" in href and len(txt) > 2 and len(txt) < 20:
+            if any(p.lower() in txt.lower() for p in MENU_PRIORITY):
+                full = href.replace(".", base_url, 1)
+                if full not in seen:
+                    topics.append({"title": txt, "url": full})
+                    seen.add(full)
+    topics.sort(key=lambda x: _menu_rank(x['title']))
+    return topics
+
+
+def synthetic_page(n_cards=400, seed=7):
+    """Imita a estrutura dos cards do Google News: stories, articles, 'Veja mais', imagens soltas."""
+    rnd = random.Random(seed)
+    menu = "".join(f'<a href="./topics/T{i}?hl=pt-BR">{t}</a>' for i, t in enumerate(
+        ["Brasil", "Mundo", "Para você", "Esportes", "Tecnologia", "Negócios", "Saúde", "Entretenimento"]))
+    cards = []
+    for i in range(n_cards):
+        kind = rnd.choice(["stories", "articles", "articles"])
+        img = rnd.choice([
+            f'<img src="https://lh3.googleusercontent.com/x{i}=s0-w200">',
+            f'<img data-src="https://img.example.com/{i}.jpg">',
+            f'<img srcset="https://cdn.example.com/{i}.webp 1x, https://cdn.example.com/{i}@2x.webp 2x">',
+            '<img src="/favicon.ico">',
+            "",
+        ])
+        heading = rnd.choice([f"<h4>Manchete número {i} sobre   o &amp; assunto</h4>", "", f"<h3><span>Título</span> <b>{i}</b> longo o bastante</h3>"])
+        link_txt = rnd.choice(["Veja mais", f"Texto de link da matéria {i}", "", "<!-- c -->Curto"])
+        extra = f'<a href="./articles/X{i}b">Outra chamada bem mais longa do card {i}</a>' if rnd.random() < 0.3 else ""
+        depth = rnd.randint(0, 5)
+        inner = f'<a href="./{kind}/ID{i % 350}?hl=pt-BR">{link_txt}</a>{extra}'
+        for _ in range(depth): inner = f"<div>{inner}</div>"
+        cards.append(f'<c-wiz><article><figure>{img}</figure>{heading}{inner}<time>há 2 horas</time></article></c-wiz>')
+    return f"<!doctype html><html><head><title>Google News</title></head><body><nav>{menu}</nav><main>{''.join(cards)}</main></body></html>"
+
+
+def page(body):
+    return f"<!doctype html><html><head><title>Google News</title></head><body>{body}</body></html>"
+
+
+# Casos de borda: (html, manchetes esperadas)
+EDGE_CASES = {
+    "card_sem_imagem": (
+        page('<article><h4>Manchete de um card sem imagem</h4><div><a href="./articles/A1">Veja mais</a></div></article>'),
+        [{"title": "Manchete de um card sem imagem", "url": f"{BASE}/articles/A1", "image": None, "is_cluster": False}],
+    ),
+    "veja_mais_pega_o_maior_link": (
+        page('<article><img src="https://lh3.googleusercontent.com/abc=w200">'
+             '<a href="./stories/S1?hl=pt-BR">Veja mais</a><a href="./articles/A2">Chamada longa da matéria principal</a></article>'),
+        [{"title": "Chamada longa da matéria principal", "url": f"{BASE}/stories/S1?hl=pt-BR",
+          "image": "https://lh3.googleusercontent.com/abc=w200", "is_cluster": True},
+         {"title": "Chamada longa da matéria principal", "url": f"{BASE}/articles/A2",
+          "image": "https://lh3.googleusercontent.com/abc=w200", "is_cluster": False}],
+    ),
+    "comentarios_fora_do_texto": (
+        page('<p><a href="./articles/A3"><!-- rastreio -->Texto do link <!-- x -->com comentário</a></p>'),
+        # get_text(strip=True) cola os pedaços sem espaço: o comentário some, o espaço em volta dele também
+        [{"title": "Texto do linkcom comentário", "url": f"{BASE}/articles/A3", "image": None, "is_cluster": False}],
+    ),
+    "link_curto_sem_card_some": (
+        page('<p><a href="./articles/A4">Curto</a></p><p><a href="./topics/T1">Brasil</a></p>'),
+        [],
+    ),
+    "favicon_e_link_repetido": (
+        page('<div><img src="/favicon.ico"><h3>Título do card com favicon</h3><a href="./articles/A5">x</a></div>'
+             '<div><a href="./articles/A5">Mesmo link em outro lugar da página</a></div>'),
+        [{"title": "Título do card com favicon", "url": f"{BASE}/articles/A5", "image": None, "is_cluster": False}],
+    ),
+}
+
+
+@pytest.mark.parametrize("seed", [7, 11, 23])
+def test_synthetic_page_parity(seed):
+    html = synthetic_page(n_cards=200, seed=seed)
+    fast = extract_headlines(html, BASE, clean_image_url)
+    assert fast == extract_headlines_bs4(html, BASE, clean_image_url)
+    assert len(fast) > 50
+    assert extract_menu_topics(html, BASE) == extract_menu_topics_bs4(html, BASE)
+
+
+@pytest.mark.parametrize("name", list(EDGE_CASES))
+def test_edge_cases(name):
+    html, expected = EDGE_CASES[name]
+    assert extract_headlines(html, BASE, clean_image_url) == expected
+    assert extract_headlines_bs4(html, BASE, clean_image_url) == expected
+
+
+def test_menu_order_and_filter():
+    html = page("".join(f'<a href="./topics/{t}">{t}</a>' for t in ["Esportes", "Para você", "Brasil", "Mundo", "Brasil"]))
+    expected = [{"title": t, "url": f"{BASE}/topics/{t}"} for t in ["Brasil", "Mundo", "Esportes"]]
+    assert extract_menu_topics(html, BASE) == expected == extract_menu_topics_bs4(html, BASE)
+
+
+def test_empty_html():
+    assert extract_headlines("", BASE, clean_image_url) == []
+    assert extract_menu_topics("", BASE) == []
+
+
+@pytest.mark.parametrize("path", FIXTURE_PAGES, ids=os.path.basename)
+def test_recorded_page_parity(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f: html = f.read()
+    assert extract_headlines(html, BASE, clean_image_url) == extract_headlines_bs4(html, BASE, clean_image_url)
+    assert extract_menu_topics(html, BASE) == extract_menu_topics_bs4(html, BASE)
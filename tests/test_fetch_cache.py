@@ -0,0 +1,79 @@
+import os
+
+import fetch_cache
+from fetch_cache import FetchCache, normalize_url, url_key
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def cache(tmp_path, monkeypatch, **kw):
+    clock = Clock()
+    monkeypatch.setattr(fetch_cache.time, "time", clock)
+    return FetchCache(root=str(tmp_path / "cache"), **kw), clock
+
+
+def test_ttl_per_kind(tmp_path, monkeypatch):
+    c, clock = cache(tmp_path, monkeypatch)
+    c.put("https://news.google.com/topics/T1", "topic", {"n": 1})
+    c.put("https://g1.globo.com/materia.html", "article", {"n": 2})
+
+    clock.now += 11 * 60  # topic vence em 10 min, artigo em 7 dias
+    assert not c.get("https://news.google.com/topics/T1", "topic").fresh
+    assert c.get("https://g1.globo.com/materia.html", "article").fresh
+    clock.now += 7 * 24 * 3600
+    entry = c.get("https://g1.globo.com/materia.html", "article")
+    assert not entry.fresh and entry.data == {"n": 2}  # vencida continua disponível
+
+
+def test_not_modified_renews_ttl(tmp_path, monkeypatch):
+    c, clock = cache(tmp_path, monkeypatch)
+    url = "https://news.google.com/stories/S1"
+    c.put(url, "story", {"n": 1}, etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    clock.now += 16 * 60
+    entry = c.get(url, "story")
+    assert not entry.fresh
+    assert entry.validators() == {"If-None-Match": '"abc"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+    c.touch(url)  # resposta 304
+    entry = c.get(url, "story")
+    assert entry.fresh and entry.data == {"n": 1} and entry.etag == '"abc"'
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://G1.Globo.com:443/a?b=2&utm_source=x&a=1&fbclid=y#topo") == "https://g1.globo.com/a?a=1&b=2"
+    assert normalize_url("http://site.com:80") == "http://site.com/"
+    assert normalize_url("http://site.com:8080/x") == "http://site.com:8080/x"
+    assert url_key("https://site.com/a?x=1&y=2") == url_key("https://site.com/a?y=2&x=1&gclid=z")
+    assert url_key("https://site.com/a?x=1") != url_key("https://site.com/a?x=2")
+
+
+def test_same_page_through_tracking_link_hits_cache(tmp_path, monkeypatch):
+    c, _ = cache(tmp_path, monkeypatch)
+    c.put("https://site.com/a?id=7", "article", {"n": 1})
+    assert c.get("https://site.com:443/a?utm_campaign=z&id=7#x", "article").data == {"n": 1}
+    assert c.get("https://site.com/a?id=8", "article") is None
+
+
+def test_lru_eviction_over_max_bytes(tmp_path, monkeypatch):
+    c, clock = cache(tmp_path, monkeypatch)
+    body = {"content": os.urandom(3000).hex()}  # aleatório: não comprime
+    for u in ("https://site.com/a", "https://site.com/b"):
+        c.put(u, "article", body)
+        clock.now += 1
+    size = c.stats()["bytes"] // 2
+    c.max_bytes = int(2.5 * size)
+
+    c.get("https://site.com/a", "article")  # "a" foi lido por último: "b" é o menos recente
+    clock.now += 1
+    c.put("https://site.com/c", "article", body)
+
+    assert c.get("https://site.com/b", "article") is None
+    assert c.get("https://site.com/a", "article") and c.get("https://site.com/c", "article")
+    assert c.stats()["entries"] == 2 and c.stats()["bytes"] <= c.max_bytes
+    assert not os.path.exists(c._path(url_key("https://site.com/b")))
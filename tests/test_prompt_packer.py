@@ -0,0 +1,46 @@
+from prompt_packer import _allocate, estimate_tokens, pack_sources
+
+
+def paragraphs(tag, n):
+    return "\n".join(f"Parágrafo {i} da fonte {tag} com um fato exclusivo e detalhado número {i}." for i in range(n))
+
+
+def art(dom, content):
+    return {"title": f"Título {dom}", "source_domain": dom, "content": content}
+
+
+def test_allocate_water_filling():
+    assert _allocate([10, 100, 100], 150) == [10, 70, 70]
+    assert _allocate([10, 20], 1000) == [10, 20]
+    assert _allocate([0, 50], 40) == [0, 40]
+
+
+def test_everything_fits_untouched():
+    arts = [art("a.com", paragraphs("a", 3)), art("b.com", paragraphs("b", 2))]
+    assert pack_sources(arts, 10_000) == [a["content"] for a in arts]
+
+
+def test_budget_is_respected_and_shared():
+    arts = [art("a.com", paragraphs("a", 60)), art("b.com", paragraphs("b", 60)), art("c.com", "Nota curta do site c.")]
+    budget = 600
+    packed = pack_sources(arts, budget)
+    overhead = sum(estimate_tokens(f"## {a['source_domain']}\n{a['title']}\n") for a in arts)
+    assert sum(estimate_tokens(p) for p in packed) <= budget - overhead
+    assert packed[2] == "Nota curta do site c."  # quem pede pouco leva tudo
+    assert packed[0] and packed[1]
+    # Lead primeiro: o parágrafo de abertura sobrevive ao corte
+    assert packed[0].startswith("Parágrafo 0 da fonte a")
+
+
+def test_repeated_sentences_lose_priority():
+    shared = "Esta frase de agência aparece igualzinha em todas as fontes da história de hoje."
+    a = art("a.com", shared + "\n" + "Apuração própria do site a com detalhes inéditos sobre o caso investigado.")
+    b = art("b.com", shared + "\n" + "Apuração própria do site b com números inéditos sobre a investigação em curso.")
+    per_para = estimate_tokens(shared)
+    packed = pack_sources([a, b], 2 * per_para + 2 * estimate_tokens("## a.com\nTítulo a.com\n") + 2)
+    assert all("Apuração própria" in p and shared not in p for p in packed)
+
+
+def test_tiny_budget_truncates_best_paragraph():
+    packed = pack_sources([art("a.com", "Um parágrafo único e bem comprido " * 20)], 20)
+    assert packed[0] and len(packed[0]) < 200
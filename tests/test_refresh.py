@@ -0,0 +1,49 @@
+import refresh
+
+
+def item(n, title=None):
+    return {"title": title or f"Manchete {n}", "url": f"https://news.google.com/stories/S{n}", "image": None}
+
+
+def test_diff_headlines():
+    old = [item(1), item(2), item(3)]
+    new = [item(2, "Manchete 2 (atualizada)"), item(3), item(4)]
+    diff = refresh.diff_headlines(old, new)
+    assert [it["url"] for it in diff["new"]] == [item(4)["url"]]
+    assert [it["url"] for it in diff["removed"]] == [item(1)["url"]]
+    assert diff["retitled"] == [{"url": item(2)["url"], "old_title": "Manchete 2", "title": "Manchete 2 (atualizada)"}]
+    assert diff["unchanged"] == 1
+
+
+def test_diff_headlines_first_snapshot():
+    diff = refresh.diff_headlines(None, [item(1), item(2)])
+    assert len(diff["new"]) == 2 and not diff["removed"] and not diff["retitled"]
+    assert diff["unchanged"] == 0
+
+
+class FakeAgg:
+    def __init__(self, news):
+        self.news = news
+        self.calls = []
+
+    def get_headlines_from_topic(self, url, revalidate=False):
+        self.calls.append((url, revalidate))
+        return self.news
+
+
+def test_refresh_topic_goes_live_and_records(tmp_db):
+    topic = {"title": "Brasil", "url": "https://news.google.com/topics/BR"}
+    refresh.record_snapshot(topic, [item(1)])
+    agg = FakeAgg([item(1), item(2)])
+    news, diff = refresh.refresh_topic(agg, topic)
+    assert agg.calls == [(topic["url"], True)]  # não pode servir a cópia fresca do cache
+    assert news == agg.news
+    assert [it["url"] for it in diff["new"]] == [item(2)["url"]]
+    assert tmp_db.get_latest_headlines(topic["url"]) == agg.news
+
+
+def test_refresh_topic_failed_crawl_keeps_snapshot(tmp_db):
+    topic = {"title": "Brasil", "url": "https://news.google.com/topics/BR"}
+    refresh.record_snapshot(topic, [item(1)])
+    assert refresh.refresh_topic(FakeAgg([]), topic) == (None, None)
+    assert tmp_db.get_latest_headlines(topic["url"]) == [item(1)]
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from scheduler import FetchScheduler, TokenBucket
+
+
+def scheduler(**kw):
+    kw.setdefault("per_domain_rate", 1000)
+    kw.setdefault("per_domain_burst", 1000)
+    kw.setdefault("backoff", 0.01)
+    return FetchScheduler(**kw)
+
+
+def fetcher(delays, calls=None):
+    """fetch(url) que dorme delays[url] s e devolve a URL; delays[url] pode ser uma exceção ou None."""
+    async def fetch(url):
+        if calls is not None: calls.append(url)
+        d = delays[url]
+        if isinstance(d, BaseException): raise d
+        if d is None: return None
+        await asyncio.sleep(d)
+        return url
+    return fetch
+
+
+def run(coro):
+    t = time.monotonic()
+    out = asyncio.run(coro)
+    return out, time.monotonic() - t
+
+
+def test_deadline_abandons_slow_fetches():
+    delays = {"https://a.com/1": 0.01, "https://b.com/1": 5}
+    out, took = run(scheduler().gather(list(delays), fetcher(delays), deadline=0.3))
+    assert out == ["https://a.com/1"]
+    assert took < 1
+
+
+def test_quorum_then_grace():
+    delays = {"https://a.com/1": 0.01, "https://b.com/1": 0.02, "https://c.com/1": 0.05, "https://d.com/1": 5}
+    seen = []
+    out, took = run(scheduler().gather(list(delays), fetcher(delays), deadline=3, quorum=2, grace=0.2,
+                                       on_result=seen.append))
+    assert out == seen == ["https://a.com/1", "https://b.com/1", "https://c.com/1"]
+    assert took < 1
+
+
+def test_quorum_already_met_starts_grace_immediately():
+    # Cache já cobriu o quórum (quorum=0): não pode esperar o prazo inteiro pelo lento
+    delays = {"https://a.com/1": 0.01, "https://b.com/1": 5}
+    out, took = run(scheduler().gather(list(delays), fetcher(delays), deadline=3, quorum=0, grace=0.3))
+    assert out == ["https://a.com/1"]
+    assert took < 1
+
+
+def test_no_quorum_waits_for_everything_within_deadline():
+    delays = {"https://a.com/1": 0.01, "https://b.com/1": 0.3}
+    out, _ = run(scheduler().gather(list(delays), fetcher(delays), deadline=3, grace=0.05))
+    assert out == ["https://a.com/1", "https://b.com/1"]
+
+
+def test_exception_is_retried():
+    attempts = []
+
+    async def flaky(url):
+        attempts.append(url)
+        if len(attempts) < 3: raise RuntimeError("503")
+        return url
+
+    out, _ = run(scheduler(retries=2).gather(["https://a.com/1"], flaky, deadline=3))
+    assert out == ["https://a.com/1"] and len(attempts) == 3
+
+
+def test_exception_gives_up_after_retries():
+    calls = []
+    delays = {"https://a.com/1": RuntimeError("sempre")}
+    out, _ = run(scheduler(retries=2).gather(list(delays), fetcher(delays, calls), deadline=3))
+    assert out == [] and len(calls) == 3
+
+
+def test_none_means_give_up_without_retry():
+    calls = []
+    delays = {"https://a.com/1": None}
+    out, _ = run(scheduler(retries=3).gather(list(delays), fetcher(delays, calls), deadline=3))
+    assert out == [] and calls == ["https://a.com/1"]
+
+
+def test_request_timeout_counts_as_failure():
+    calls = []
+    delays = {"https://a.com/1": 5}
+    out, took = run(scheduler(request_timeout=0.05, retries=1).gather(list(delays), fetcher(delays, calls), deadline=3))
+    assert out == [] and len(calls) == 2 and took < 1
+
+
+def test_token_bucket_limits_rate():
+    async def take(n):
+        bucket = TokenBucket(rate=20, burst=2)
+        for _ in range(n): await bucket.take()
+
+    _, took = run(take(6))
+    assert 0.15 < took < 0.5  # 2 de rajada + 4 a 20/s
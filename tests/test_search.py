@@ -0,0 +1,68 @@
+import pytest
+
+import database as db
+
+
+def art(dom, title, content="texto qualquer da matéria"):
+    return {"title": title, "source_domain": dom, "url": f"https://{dom}/{abs(hash(title))}", "content": content}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("reforma tributária", '"reforma" "tributária"*'),
+    ('"aspas" OR NOT -x', '"aspas" "OR" "NOT" "x"*'),
+    ("inflação", '"inflação"*'),
+    ("  ", None),
+    ("", None),
+])
+def test_fts_query(text, expected):
+    assert db._fts_query(text) == expected
+
+
+def test_search_by_summary_and_sources(tmp_db):
+    a = tmp_db.save_full_report("u1", "Reforma", "Câmara aprova reforma tributária em segundo turno.",
+                                [art("g1.globo.com", "Votação na Câmara")])
+    b = tmp_db.save_full_report("u2", "Clima", "Chuvas no Sul.",
+                                [art("folha.uol.com.br", "Enchente no Rio Grande do Sul"),
+                                 art("estadao.com.br", "Reforma das casas atingidas")])
+    hits = tmp_db.search_reports("reforma")
+    assert sorted(h["id"] for h in hits) == [a, b]  # pelo resumo (a) e pelo título de uma fonte (b)
+    assert all("**reforma**" in h["snippet"].lower() for h in hits)
+    assert hits[0]["score"] <= hits[1]["score"]
+    assert [h["id"] for h in tmp_db.search_reports("enche")] == [b]  # prefixo no último termo
+    assert tmp_db.search_reports("inexistente") == []
+
+
+def test_search_filters(tmp_db):
+    a = tmp_db.save_full_report("u1", "Juros", "Copom mantém juros.", [art("g1.globo.com", "Juros")])
+    b = tmp_db.save_full_report("u2", "Juros", "Copom mantém juros.", [art("www.valor.globo.com", "Juros")])
+    with tmp_db.connection() as conn:
+        conn.execute("UPDATE reports SET created_at = '2024-01-10 12:00:00' WHERE id = ?", (a,))
+        conn.execute("UPDATE reports SET created_at = '2024-03-05 08:00:00' WHERE id = ?", (b,))
+    ids = lambda **kw: [h["id"] for h in tmp_db.search_reports("juros", **kw)]
+    assert ids(domain="valor.globo.com") == [b]
+    assert sorted(ids(domain="globo.com")) == [a, b]
+    assert ids(date_from="2024-03-01") == [b]
+    assert ids(date_to="2024-01-10") == [a]
+    assert ids(date_from="2024-02-01", date_to="2024-02-28") == []
+
+
+def test_filter_is_applied_before_top_k(tmp_db):
+    # Muitos relatórios melhores fora do filtro não podem esconder o único que passa nele
+    for i in range(40):
+        tmp_db.save_full_report(f"u{i}", "Petróleo", "petróleo petróleo petróleo", [art("g1.globo.com", "Petróleo")])
+    target = tmp_db.save_full_report("alvo", "Energia", "Preço do petróleo sobe.", [art("nexojornal.com.br", "Energia")])
+    hits = tmp_db.search_reports("petróleo", limit=1, domain="nexojornal.com.br")
+    assert [h["id"] for h in hits] == [target]
+
+
+def test_pagination_and_many_sources_per_report(tmp_db):
+    # Relatório com muitas fontes que casam não pode ocupar todos os candidatos
+    crowded = tmp_db.save_full_report("u0", "Eleição", "Resumo.",
+                                      [art(f"site{j}.com.br", f"Eleição {j}") for j in range(30)])
+    others = [tmp_db.save_full_report(f"u{i}", "Eleição", "Eleição municipal.", [art("g1.globo.com", "Outra")])
+              for i in range(1, 6)]
+    page1 = tmp_db.search_reports("eleição", limit=3)
+    page2 = tmp_db.search_reports("eleição", limit=3, offset=3)
+    got = [h["id"] for h in page1 + page2]
+    assert sorted(got) == sorted([crowded] + others)
+    assert all(h["snippet"] for h in page1 + page2)
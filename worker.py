@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Worker de pré-crawl: varre menu e tópicos em ciclo e grava tudo no news_intel.db.
+
+Guarda snapshots do menu e das manchetes de cada tópico e pré-gera os dossiês das
+top-N histórias por tópico. O dashboard lê do banco primeiro, então com o worker
+rodando a página vira leitura de banco em vez de crawl + IA no clique.
+
+Uso:
+    python worker.py                  # ciclo a cada 15 min
+    python worker.py --once --top 3   # um ciclo só (ex.: cron)
+    python worker.py --metrics-port 9108   # /metrics no formato Prometheus
+"""
+import argparse
+import os
+import time
+from dotenv import load_dotenv
+from app import NewsAggregatorPro
+import database as db
+import dossier
+import refresh
+import metrics
+
+
+def prebuild_dossier(agg, item, api_key):
+    content = agg.get_story_content(item['url'])
+    if not content:
+        print(f"   ⚠️ Sem fontes: {item['title'][:60]}")
+        return None
+    _, mode = dossier.get_or_build_report(item['url'], item['title'], content, api_key)
+    print(f"   🧾 Dossiê ({mode}): {item['title'][:60]}")
+    return mode
+
+
+def run_cycle(agg, top_n, api_key, concurrency=4):
+    with metrics.span("worker_cycle"):
+        _cycle(agg, top_n, api_key, concurrency)
+
+
+def _cycle(agg, top_n, api_key, concurrency):
+    started = time.time()
+    print("🛰️ Ciclo de pré-crawl")
+
+    menu = agg.get_menu_topics()
+    if menu: db.save_menu_snapshot(menu)
+    else:
+        print("   ⚠️ Menu vazio, usando o último snapshot")
+        menu = db.get_latest_menu() or []
+
+    scanned = []
+    for topic, news in agg.get_all_headlines(menu, concurrency=concurrency):
+        if not news: continue
+        diff = refresh.record_snapshot(topic, news)
+        scanned.append((topic, news))
+        print(f"   📸 {topic['title']}: {len(news)} manchetes | {refresh.describe(diff)}")
+
+    if api_key and top_n:
+        for topic, news in scanned:
+            # Só histórias novas ou com fontes diferentes desde o último dossiê
+            todo = refresh.stories_needing_work(agg, news[:top_n])
+            print(f"   🔁 {topic['title']}: {len(todo)}/{len(news[:top_n])} histórias para processar")
+            for item, links_hash in todo:
+                try:
+                    if prebuild_dossier(agg, item, api_key) not in (None, "error"):
+                        db.mark_story_dived(item['url'], links_hash)
+                except Exception as e: print(f"   ❌ Erro no dossiê '{item['title'][:40]}': {e}")
+    elif top_n:
+        print("   ⚠️ GEMINI_API_KEY ausente: só manchetes, sem dossiês")
+
+    db.prune_snapshots()
+    print(f"✅ Ciclo em {time.time() - started:.0f}s ({len(scanned)} tópicos)")
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Pré-crawl de manchetes e dossiês para o news_intel.db")
+    parser.add_argument("--interval", type=int, default=int(os.getenv("WORKER_INTERVAL", "900")), help="segundos entre ciclos")
+    parser.add_argument("--top", type=int, default=int(os.getenv("WORKER_TOP_N", "5")), help="dossiês por tópico")
+    parser.add_argument("--concurrency", type=int, default=4, help="tópicos varridos ao mesmo tempo")
+    parser.add_argument("--once", action="store_true", help="roda um ciclo e sai")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("METRICS_PORT", "0")), help="porta do /metrics (0 = desligado)")
+    parser.add_argument("--metrics-file", default=os.getenv("METRICS_FILE"), help="arquivo .prom reescrito a cada ciclo")
+    args = parser.parse_args()
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+        print(f"📈 Métricas em http://localhost:{args.metrics_port}/metrics")
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    with NewsAggregatorPro() as agg:
+        while True:
+            try: run_cycle(agg, args.top, api_key, args.concurrency)
+            except Exception as e: print(f"❌ Ciclo falhou: {e}")
+            if args.metrics_file: metrics.write_prometheus(args.metrics_file)
+            if args.once: break
+            time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()